@@ -1,11 +1,14 @@
-import ctypes as c
 import os
 import threading
-import win32gui
-import win32process
 import pytesseract
 
 from Functions.MemoryFunctions import enable_debug_privilege_pywin32
+from Platform.PlatformAbstraction import memory_api, window_api, IS_WINDOWS
+
+if IS_WINDOWS:
+    import win32gui
+else:
+    from Platform.PlatformAbstraction import win32gui
 TITLE_BAR_OFFSET = 35
 # Locks
 walker_Lock = threading.Lock()
@@ -75,6 +78,13 @@ client_name = None
 square_size = 75
 application_architecture = 32
 collect_threshold = 0.85
+pointer_cache_interval = 1.0  # Seconds between first hop checks of cached pointer chains
+state_poll_interval = 20  # Milliseconds between state poller reads, 0 disables the poller
+memory_backend = "auto"  # Linux read backend: auto, process_vm_readv or proc_mem
+frame_service_fps = 20  # Screen captures per second shared by the vision modules, 0 disables the frame service
+frame_ring_size = 4  # Frames kept by the frame service
+loot_matching = "native"  # Loot template matching: native, upscaled (the 3x upscaled pipeline) or slots (container slot hashing)
+match_workers = 0  # Threads matching loot templates in parallel, 0 uses every available core but one
 
 # Coordinates
 screen_x = [0] * 1
@@ -143,26 +153,34 @@ def load_tibia(window_title=None, proc_id=None, hwnd=None) -> None:
         client_name = ""
         game_name = fin_window_name(client_name)
         game = win32gui.FindWindow(None, game_name)
-        thread_id, proc_id = win32process.GetWindowThreadProcessId(game)
+        thread_id, proc_id = window_api.get_window_thread_process_id(game)
     
     os.makedirs("Images/" + client_name, exist_ok=True)
     print(f"Connected to: {game_name}")
 
+    # Cached addresses belong to the previously attached process
+    from Functions.MemoryFunctions import pointer_cache, creature_index
+    pointer_cache.invalidate()
+    creature_index.clear()
+
     # Loading Addresses
-    process_handle = c.windll.kernel32.OpenProcess(0x1F0FFF, False, proc_id)
-    modules = win32process.EnumProcessModules(process_handle)
-    base_address = modules[0]
+    process_handle = memory_api.open_process(proc_id)
+    base_address = memory_api.get_base_address(process_handle)
 
+    # Pick the fastest read backend for this kernel and ptrace setup
+    memory_api.select_backend(process_handle, base_address, memory_backend)
 
-def load_custom_addresses():
+
+def load_custom_addresses(path="Save/Settings/addresses.json"):
     global my_x_address, my_x_address_offset, my_y_address, my_y_address_offset, my_z_address, my_z_address_offset,\
         my_stats_address, my_hp_offset, my_hp_max_offset, my_mp_offset, my_mp_max_offset, \
         attack_address, attack_address_offset, my_attack_type, my_x_type, my_y_type, my_z_type, my_hp_type, my_mp_type, \
         target_x_offset, target_y_offset, target_z_offset, target_hp_offset, target_name_offset, \
-        square_size, application_architecture, collect_threshold
+        square_size, application_architecture, collect_threshold, pointer_cache_interval, state_poll_interval, memory_backend, \
+        frame_service_fps, frame_ring_size, loot_matching, match_workers
 
     try:
-        with open("Save/Settings/addresses.json", "r") as f:
+        with open(path, "r") as f:
             import json
             data = json.load(f)
             
@@ -172,6 +190,20 @@ def load_custom_addresses():
                 square_size = int(config["square_size"])
             if "collect_threshold" in config and config["collect_threshold"]:
                 collect_threshold = float(config["collect_threshold"])
+            if "pointer_cache_interval" in config and config["pointer_cache_interval"]:
+                pointer_cache_interval = float(config["pointer_cache_interval"])
+            if "state_poll_interval" in config and config["state_poll_interval"] != "":
+                state_poll_interval = int(config["state_poll_interval"])
+            if "memory_backend" in config and config["memory_backend"]:
+                memory_backend = config["memory_backend"]
+            if "frame_service_fps" in config and config["frame_service_fps"] != "":
+                frame_service_fps = int(config["frame_service_fps"])
+            if "frame_ring_size" in config and config["frame_ring_size"]:
+                frame_ring_size = int(config["frame_ring_size"])
+            if "loot_matching" in config and config["loot_matching"]:
+                loot_matching = config["loot_matching"]
+            if "match_workers" in config and config["match_workers"] != "":
+                match_workers = int(config["match_workers"])
             if "architecture" in config:
                 arch_str = config["architecture"]
                 if "64" in arch_str:
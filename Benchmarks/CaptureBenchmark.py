@@ -0,0 +1,46 @@
+"""
+Compares X11 screen capture through the X socket (get_image) with MIT-SHM on Linux.
+Captures a region of the root window, or of the window id given.
+
+Usage: python Benchmarks/CaptureBenchmark.py [width] [height] [window id] [seconds per case]
+"""
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Platform.PlatformAbstraction import screen_api
+
+
+def run_case(name, function, duration):
+    count = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < duration:
+        function()
+        count += 1
+    rate = count / (time.perf_counter() - started)
+    print(f"{name:<30} {rate:>10,.1f} frames/s")
+    return rate
+
+
+def main():
+    w = int(sys.argv[1]) if len(sys.argv) > 1 else 800
+    h = int(sys.argv[2]) if len(sys.argv) > 2 else 600
+    hwnd = int(sys.argv[3], 0) if len(sys.argv) > 3 else screen_api.display.screen().root.id
+    duration = float(sys.argv[4]) if len(sys.argv) > 4 else 2.0
+    print(f"Capturing {w}x{h} of window {hwnd:#x}")
+
+    screen_api.use_shm = False
+    socket_frame = screen_api.capture_window(hwnd, 0, 0, w, h).copy()
+    before = run_case("get_image (X socket)", lambda: screen_api.capture_window(hwnd, 0, 0, w, h), duration)
+
+    screen_api.use_shm = True
+    if screen_api.shm_capture() is None:
+        return
+    shm_frame = screen_api.capture_window(hwnd, 0, 0, w, h)
+    print(f"Frames identical: {(socket_frame[..., :3] == shm_frame[..., :3]).all()}")
+    after = run_case("XShmGetImage (shared memory)", lambda: screen_api.capture_window(hwnd, 0, 0, w, h), duration)
+    print(f"speedup: {after / before:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+End-to-end reaction latency and throughput of HealThread, TargetThread and WalkerThread.
+Starts Benchmarks/GameSimulator.py, points the bot at its memory (real process_vm_readv
+reads) and routes all input to it through input_api.use_sink(), so no game client or
+X server is needed. Linux only: on Windows KeyboardFunctions posts to the window directly.
+
+Usage: python Benchmarks/EndToEndBenchmark.py [--seconds 30] [--modules heal,target,walker] [--stats FILE]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from PyQt5.QtCore import QCoreApplication
+
+import Addresses
+from Platform.PlatformAbstraction import memory_api, input_api
+from Functions.InstrumentationFunctions import memory_stats
+from Functions.MemoryFunctions import read_my_wpt
+from General.StatePollerThread import StatePollerThread
+from HealAttack.HealingAttackThread import HealThread
+from Target.TargetThread import TargetThread
+from Walker.WalkerThread import WalkerThread
+from Benchmarks.GameSimulator import SimulatorInput, DEFAULT_PORT
+
+HEAL_BELOW = 60
+HEAL_KEY = 1
+ATTACK_KEY = 12
+
+
+def start_threads(modules, start_x, start_y, start_z):
+    threads = []
+    if 'heal' in modules:
+        threads.append(HealThread([{"Type": "HP%", "Key": f"F{HEAL_KEY}", "Below": HEAL_BELOW, "Above": 0, "MinMp": 0}]))
+    if 'target' in modules:
+        # TargetThread presses F(attack_key + 1)
+        threads.append(TargetThread([{"Name": "*", "Dist": 0, "Stance": 1, "Skin": 0}], 0, ATTACK_KEY - 1))
+    if 'walker' in modules:
+        corners = ((-3, -3), (3, -3), (3, 3), (-3, 3))
+        waypoints = [{"Action": 0, "Direction": 0, "X": start_x + dx, "Y": start_y + dy, "Z": start_z}
+                     for dx, dy in corners]
+        threads.append(WalkerThread(waypoints))
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end benchmark against the game simulator")
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--modules", default="heal,target,walker")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--addresses", help="addresses.json whose offsets and types the simulator uses")
+    parser.add_argument("--stats", metavar="FILE", help="write memory read stats as JSON")
+    args = parser.parse_args()
+    modules = set(args.modules.split(','))
+
+    app = QCoreApplication([])
+    directory = tempfile.mkdtemp(prefix="otibia_simulator_")
+    layout = os.path.join(directory, "addresses.json")
+    report = os.path.join(directory, "report.json")
+    command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "GameSimulator.py"),
+               "--layout", layout, "--report", report, "--port", str(args.port),
+               "--heal-key", str(HEAL_KEY), "--attack-key", str(ATTACK_KEY), "--heal-below", str(HEAL_BELOW)]
+    if args.addresses:
+        command += ["--addresses", args.addresses]
+    simulator = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    print(simulator.stdout.readline().strip())
+
+    Addresses.load_custom_addresses(layout)
+    Addresses.process_handle = memory_api.open_process(simulator.pid)
+    Addresses.base_address = 0
+    Addresses.game = 0
+    memory_api.select_backend(Addresses.process_handle, Addresses.my_x_address, Addresses.memory_backend)
+    input_api.use_sink(SimulatorInput(args.port))
+    if args.stats:
+        memory_stats.enable()
+
+    poller = None
+    if Addresses.state_poll_interval > 0:
+        poller = StatePollerThread()
+        poller.start()
+    threads = start_threads(modules, *read_my_wpt())
+
+    deadline = time.monotonic() + args.seconds
+    while time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.05)
+
+    for thread in threads:
+        thread.stop()
+        thread.wait()
+    if poller:
+        poller.stop()
+        poller.wait()
+    simulator.terminate()
+    simulator.wait()
+    input_api.use_sink(None)
+
+    with open(report, "r") as f:
+        results = json.load(f)
+    print(f"Modules: {', '.join(sorted(modules))}, {args.seconds:.0f} s")
+    for name in ("heal_latency", "attack_latency", "walk_latency", "input_transport", "kill_time"):
+        stats = results[name]
+        if stats["count"]:
+            print(f"  {name:<16} n={stats['count']:<5} avg {stats['avg_ms']:8.1f} ms  p50 {stats['p50_ms']:8.1f} ms"
+                  f"  p95 {stats['p95_ms']:8.1f} ms  max {stats['max_ms']:8.1f} ms")
+    print(f"  heals {results['heals']}, kills {results['kills']} ({results['kills_per_min']}/min), "
+          f"steps {results['steps']} ({results['steps_per_s']}/s), deaths {results['deaths']}, "
+          f"lowest HP {results['lowest_hp_percent']}%")
+    if args.stats:
+        print(f"Memory stats written to {memory_stats.dump(args.stats)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,429 @@
+"""
+Stand-in game client for end-to-end tests on a headless machine.
+The simulator keeps player stats, position, an attack slot and a few creature structs
+in ctypes memory, laid out with the offsets and types of an addresses.json, and writes
+the resulting addresses to --layout so the bot can read them with process_vm_readv.
+Player damage, monster spawns and monster movement run on their own; heal hotkeys,
+the attack hotkey and arrow keys sent by the bot through SimulatorInput change the state.
+On exit it writes reaction latency and throughput numbers to --report.
+
+Usage: python Benchmarks/GameSimulator.py --layout FILE [--addresses FILE] [--seconds N] [--report FILE]
+"""
+import argparse
+import ctypes as c
+import json
+import os
+import random
+import signal
+import socket
+import struct
+import time
+
+DEFAULT_PORT = 47800
+# monotonic send time, message, wparam, lparam
+INPUT_MESSAGE = struct.Struct('<dIII')
+
+WM_KEYDOWN = 0x0100
+VK_F1 = 0x70
+# Arrow and diagonal keys sent by KeyboardFunctions.walk -> (dx, dy)
+STEP_KEYS = {
+    0x26: (0, -1), 0x28: (0, 1), 0x27: (1, 0), 0x25: (-1, 0),
+    0x21: (1, -1), 0x24: (-1, -1), 0x22: (1, 1), 0x23: (-1, 1),
+}
+
+TYPE_FORMATS = {"Byte": 'b', "Short": 'h', "Int": 'i', "Long": 'Q', "Double": 'd', "String": '32s', "Unicode String": '32s'}
+
+# Used for every entry missing from --addresses
+DEFAULT_LAYOUT = {
+    "my_hp": {"offset": "0", "type": "Int"},
+    "my_hp_max": {"offset": "4"},
+    "my_mp": {"offset": "8", "type": "Int"},
+    "my_mp_max": {"offset": "c"},
+    "my_x": {"offset": "", "type": "Int"},
+    "my_y": {"offset": "", "type": "Int"},
+    "my_z": {"offset": "", "type": "Short"},
+    "attack": {"offset": "", "type": "Long"},
+    "target_x": {"offset": "4", "type": "Int"},
+    "target_y": {"offset": "8", "type": "Int"},
+    "target_z": {"offset": "c", "type": "Short"},
+    "target_name": {"offset": "10", "type": "String"},
+    "target_hp": {"offset": "30", "type": "Byte"},
+}
+
+# (entry, entry holding its address, entry holding its type)
+PLAYER_FIELDS = (
+    ('my_hp', 'my_hp', 'my_hp'),
+    ('my_hp_max', 'my_hp', 'my_hp'),
+    ('my_mp', 'my_hp', 'my_mp'),
+    ('my_mp_max', 'my_hp', 'my_mp'),
+    ('my_x', 'my_x', 'my_x'),
+    ('my_y', 'my_y', 'my_y'),
+    ('my_z', 'my_z', 'my_z'),
+    ('attack', 'attack', 'attack'),
+)
+TARGET_FIELDS = ('target_x', 'target_y', 'target_z', 'target_name', 'target_hp')
+
+# Same size as String, but written as UTF-16 for the Unicode String type
+UNICODE_STRUCT = struct.Struct('<32s')
+
+ARENA_SIZE = 4 * 1024 * 1024
+BLOCK_SIZE = 64 * 1024
+ROOT_SIZE = 64
+CREATURE_NAMES = ("Rat", "Cave Rat", "Troll", "Orc", "Wolf")
+CREATURE_ID_BASE = 0x40000000
+
+
+def field_struct(type_name):
+    if type_name == "Unicode String":
+        return UNICODE_STRUCT
+    return struct.Struct('<' + TYPE_FORMATS[type_name or "Int"])
+
+
+def parse_offsets(value):
+    return [int(part.strip(), 16) for part in value.split(',') if part.strip()] if value else []
+
+
+def latency_stats(values):
+    """count / avg / p50 / p95 / max in milliseconds"""
+    if not values:
+        return {"count": 0}
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "avg_ms": round(sum(values) / len(values) * 1000, 2),
+        "p50_ms": round(values[len(values) // 2] * 1000, 2),
+        "p95_ms": round(values[min(len(values) - 1, int(len(values) * 0.95))] * 1000, 2),
+        "max_ms": round(values[-1] * 1000, 2),
+    }
+
+
+class SimulatorInput:
+    """InputAPI stand-in for input_api.use_sink(), sends every posted message to a GameSimulator"""
+
+    def __init__(self, port=DEFAULT_PORT, host='127.0.0.1'):
+        self.address = (host, port)
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def post_message(self, hwnd, msg, wparam, lparam):
+        self.socket.sendto(INPUT_MESSAGE.pack(time.monotonic(), msg, wparam & 0xFFFFFFFF, lparam & 0xFFFFFFFF), self.address)
+        return True
+
+
+class Creature:
+    __slots__ = ('address', 'creature_id', 'name', 'x', 'y', 'z', 'hp', 'alive', 'spawned_at', 'moved_at')
+
+    def __init__(self, address, creature_id):
+        self.address = address
+        self.creature_id = creature_id
+        self.name = ""
+        self.x = self.y = self.z = 0
+        self.hp = 0
+        self.alive = False
+        self.spawned_at = 0
+        self.moved_at = 0
+
+
+class GameSimulator:
+    """
+    Owns the simulated client memory and game rules.
+    Latencies are measured from the moment a reaction became possible:
+    heal from HP dropping to heal_below %, attack from having no target while
+    a monster is alive, walk from the step cooldown of the previous step ending.
+    """
+
+    def __init__(self, layout, port=DEFAULT_PORT, heal_key=1, mana_key=2, attack_key=12,
+                 heal_below=60, max_creatures=3, step_cooldown=0.1, seed=None):
+        self.random = random.Random(seed)
+        self.layout = layout
+        self.heal_key = heal_key
+        self.mana_key = mana_key
+        self.attack_key = attack_key
+        self.heal_below = heal_below
+        self.step_cooldown = step_cooldown
+
+        self.arena = (c.c_char * ARENA_SIZE)()
+        self.memory = memoryview(self.arena).cast('B')
+        self.arena_address = c.addressof(self.arena)
+        self.allocated = 0
+        self.roots = {}
+        self.blocks = {}
+
+        # (address, struct) of every player field
+        self.fields = {}
+        for name, root, type_entry in PLAYER_FIELDS:
+            offsets = parse_offsets(layout[name].get("offset", ""))
+            if name == 'attack':
+                # Attack value is read directly at its address, also in ID mode (offset -1)
+                offsets = []
+            self.fields[name] = (self.place(root, offsets), field_struct(layout[type_entry].get("type")))
+        self.id_mode = parse_offsets(layout['attack'].get("offset", "")) == [-1]
+
+        self.target_fields = {}
+        creature_size = 8
+        for name in TARGET_FIELDS:
+            offset = parse_offsets(layout[name].get("offset", ""))[0]
+            self.target_fields[name] = (offset, field_struct(layout[name].get("type")))
+            creature_size = max(creature_size, offset + self.target_fields[name][1].size)
+        self.creatures = [Creature(self.alloc(creature_size + 8), CREATURE_ID_BASE + i * 7919)
+                          for i in range(max_creatures)]
+
+        self.max_hp, self.max_mp = 1000, 500
+        self.hp, self.mp = self.max_hp, self.max_mp
+        self.x, self.y, self.z = 32000, 32000, 7
+        self.target = None
+        self.write_player()
+
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(('127.0.0.1', port))
+        self.socket.setblocking(False)
+
+        self.started = time.monotonic()
+        self.next_damage = self.started + 1
+        self.next_spawn = self.started + 0.5
+        self.last_hit = 0
+        self.last_step = 0
+        self.low_hp_since = None
+        self.no_target_since = None
+        self.inputs = {}
+        self.transport = []
+        self.heal_latency = []
+        self.attack_latency = []
+        self.walk_latency = []
+        self.kill_times = []
+        self.steps = self.kills = self.deaths = self.heals = 0
+        self.lowest_hp = 100
+
+    # --- Memory layout ---
+
+    def alloc(self, size):
+        address = self.arena_address + self.allocated
+        self.allocated += (size + 7) & ~7
+        if self.allocated > ARENA_SIZE:
+            raise MemoryError("Layout does not fit in the simulator arena")
+        return address
+
+    def place(self, root, offsets):
+        """Builds the pointer chain for root + offsets and returns the address of its value"""
+        if root not in self.roots:
+            self.roots[root] = self.alloc(ROOT_SIZE)
+        address = self.roots[root]
+        for i, offset in enumerate(offsets):
+            key = (root, tuple(offsets[:i]))
+            block = self.blocks.get(key)
+            if block is None:
+                block = self.blocks[key] = self.alloc(BLOCK_SIZE)
+                struct.pack_into('<Q', self.memory, address - self.arena_address, block)
+            if offset + ROOT_SIZE > BLOCK_SIZE:
+                raise ValueError(f"Offset {offset:#x} of {root} is too large for the simulator")
+            address = block + offset
+        return address
+
+    def write(self, address, field_struct, value):
+        if isinstance(value, str):
+            value = value.encode('utf-16-le' if field_struct is UNICODE_STRUCT else 'utf-8')
+        field_struct.pack_into(self.memory, address - self.arena_address, value)
+
+    def write_player(self):
+        values = {
+            'my_hp': self.hp, 'my_hp_max': self.max_hp, 'my_mp': self.mp, 'my_mp_max': self.max_mp,
+            'my_x': self.x, 'my_y': self.y, 'my_z': self.z,
+        }
+        for name, value in values.items():
+            self.write(*self.fields[name], value)
+        attack = 0
+        if self.target is not None:
+            attack = self.target.creature_id if self.id_mode else self.target.address
+        self.write(*self.fields['attack'], attack)
+
+    def write_creature(self, creature):
+        struct.pack_into('<I', self.memory, creature.address - self.arena_address, creature.creature_id if creature.alive else 0)
+        values = {'target_x': creature.x, 'target_y': creature.y, 'target_z': creature.z,
+                  'target_name': creature.name, 'target_hp': creature.hp}
+        for name, value in values.items():
+            offset, target_struct = self.target_fields[name]
+            self.write(creature.address + offset, target_struct, value)
+
+    def layout_json(self):
+        """addresses.json pointing into this process, for a bot with base_address 0"""
+        data = json.loads(json.dumps(self.layout))
+        data.setdefault("game_config", {})["architecture"] = "64"
+        for name, root, type_entry in PLAYER_FIELDS:
+            if name == root:
+                data[name]["address"] = hex(self.roots[root])
+        return data
+
+    # --- Game rules ---
+
+    def step(self, now):
+        self.receive_input(now)
+        alive = [creature for creature in self.creatures if creature.alive]
+
+        if now >= self.next_damage:
+            self.next_damage = now + self.random.uniform(0.3, 0.7)
+            if alive or self.random.random() < 0.3:
+                self.hp -= int(self.max_hp * self.random.uniform(0.05, 0.15))
+        self.mp = min(self.max_mp, self.mp + 1)
+        if self.hp <= 0:
+            self.deaths += 1
+            self.hp = self.max_hp
+        hp_percentage = self.hp * 100 / self.max_hp
+        self.lowest_hp = min(self.lowest_hp, hp_percentage)
+        if hp_percentage <= self.heal_below:
+            if self.low_hp_since is None:
+                self.low_hp_since = now
+        else:
+            self.low_hp_since = None
+
+        if now >= self.next_spawn and len(alive) < len(self.creatures):
+            self.next_spawn = now + self.random.uniform(1.0, 3.0)
+            creature = next(creature for creature in self.creatures if not creature.alive)
+            creature.alive = True
+            creature.name = self.random.choice(CREATURE_NAMES)
+            creature.x = self.x + self.random.choice((-1, 1)) * self.random.randint(3, 6)
+            creature.y = self.y + self.random.choice((-1, 1)) * self.random.randint(0, 6)
+            creature.z = self.z
+            creature.hp = 100
+            creature.spawned_at = creature.moved_at = now
+            alive.append(creature)
+
+        for creature in alive:
+            if now - creature.moved_at >= 0.6 and max(abs(creature.x - self.x), abs(creature.y - self.y)) > 1:
+                creature.moved_at = now
+                creature.x += (self.x > creature.x) - (self.x < creature.x)
+                creature.y += (self.y > creature.y) - (self.y < creature.y)
+
+        target = self.target
+        if target is not None and now - self.last_hit >= 0.25 and max(abs(target.x - self.x), abs(target.y - self.y)) <= 1:
+            self.last_hit = now
+            target.hp = max(0, target.hp - self.random.randint(8, 20))
+            if target.hp == 0:
+                target.alive = False
+                self.kills += 1
+                self.kill_times.append(now - target.spawned_at)
+                self.target = None
+        if self.target is None and any(creature.alive for creature in self.creatures):
+            if self.no_target_since is None:
+                self.no_target_since = now
+        else:
+            self.no_target_since = None
+
+        for creature in self.creatures:
+            self.write_creature(creature)
+        self.write_player()
+
+    def receive_input(self, now):
+        while True:
+            try:
+                data = self.socket.recv(64)
+            except BlockingIOError:
+                return
+            sent, msg, wparam, lparam = INPUT_MESSAGE.unpack(data)
+            self.transport.append(now - sent)
+            self.inputs[hex(msg)] = self.inputs.get(hex(msg), 0) + 1
+            if msg == WM_KEYDOWN:
+                self.handle_key(wparam, now)
+
+    def handle_key(self, key, now):
+        if key in STEP_KEYS:
+            if now - self.last_step < self.step_cooldown:
+                return
+            if self.last_step and now - self.last_step < 1:
+                # Only while walking continuously, pauses for fights are not latency
+                self.walk_latency.append(now - self.last_step - self.step_cooldown)
+            self.last_step = now
+            dx, dy = STEP_KEYS[key]
+            if not any(creature.alive and (creature.x, creature.y) == (self.x + dx, self.y + dy) for creature in self.creatures):
+                self.x += dx
+                self.y += dy
+                self.steps += 1
+            return
+        hotkey = key - VK_F1 + 1
+        if hotkey == self.heal_key:
+            if self.low_hp_since is not None:
+                self.heal_latency.append(now - self.low_hp_since)
+            self.hp = min(self.max_hp, self.hp + self.max_hp // 4)
+            self.heals += 1
+        elif hotkey == self.mana_key:
+            self.mp = min(self.max_mp, self.mp + self.max_mp // 4)
+        elif hotkey == self.attack_key and self.target is None:
+            alive = [creature for creature in self.creatures if creature.alive]
+            if alive:
+                if self.no_target_since is not None:
+                    self.attack_latency.append(now - self.no_target_since)
+                self.target = min(alive, key=lambda creature: max(abs(creature.x - self.x), abs(creature.y - self.y)))
+
+    def report(self):
+        duration = time.monotonic() - self.started
+        return {
+            "duration_s": round(duration, 2),
+            "inputs": self.inputs,
+            "input_transport": latency_stats(self.transport),
+            "heal_latency": latency_stats(self.heal_latency),
+            "attack_latency": latency_stats(self.attack_latency),
+            "walk_latency": latency_stats(self.walk_latency),
+            "kill_time": latency_stats(self.kill_times),
+            "heals": self.heals,
+            "kills": self.kills,
+            "deaths": self.deaths,
+            "steps": self.steps,
+            "steps_per_s": round(self.steps / duration, 2) if duration else 0,
+            "kills_per_min": round(self.kills * 60 / duration, 2) if duration else 0,
+            "lowest_hp_percent": round(self.lowest_hp, 1),
+        }
+
+    def run(self, seconds, tick=0.005):
+        running = [True]
+
+        def stop(signum, frame):
+            running[0] = False
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        deadline = self.started + seconds if seconds else None
+        while running[0] and (deadline is None or time.monotonic() < deadline):
+            self.step(time.monotonic())
+            time.sleep(tick)
+        return self.report()
+
+
+def load_layout(path):
+    layout = json.loads(json.dumps(DEFAULT_LAYOUT))
+    if path and os.path.exists(path):
+        with open(path, "r") as f:
+            data = json.load(f)
+        for name in DEFAULT_LAYOUT:
+            entry = data.get(name, {})
+            if entry.get("offset", "").strip() or entry.get("type"):
+                layout[name].update({key: value for key, value in entry.items() if key in ("offset", "type") and value})
+        if "game_config" in data:
+            layout["game_config"] = data["game_config"]
+    return layout
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulated game client for end-to-end benchmarks")
+    parser.add_argument("--layout", required=True, help="where to write the addresses.json of this process")
+    parser.add_argument("--addresses", help="addresses.json whose offsets and types are used")
+    parser.add_argument("--seconds", type=float, default=0, help="run time, 0 runs until interrupted")
+    parser.add_argument("--report", help="write the report as JSON to this file")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--heal-key", type=int, default=1)
+    parser.add_argument("--mana-key", type=int, default=2)
+    parser.add_argument("--attack-key", type=int, default=12)
+    parser.add_argument("--heal-below", type=float, default=60, help="HP percentage the bot heals below")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    simulator = GameSimulator(load_layout(args.addresses), args.port, args.heal_key, args.mana_key,
+                              args.attack_key, args.heal_below, seed=args.seed)
+    with open(args.layout, "w") as f:
+        json.dump(simulator.layout_json(), f, indent=4)
+    print(f"Simulator ready, pid {os.getpid()}, layout {args.layout}", flush=True)
+    report = simulator.run(args.seconds)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=4)
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == '__main__':
+    main()
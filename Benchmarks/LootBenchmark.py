@@ -0,0 +1,199 @@
+"""
+Speed and accuracy of the LootThread item detection on recorded loot area frames.
+Runs prepare_templates and detect_items headless, without clicking, for every
+matching mode and collect_threshold given, and scores the hits against ground truth.
+
+Usage:
+    python Benchmarks/LootBenchmark.py run <frames dir> <loot profile json | templates dir> [--modes native slots] [--thresholds 0.8 0.85]
+    python Benchmarks/LootBenchmark.py generate <frames dir> <loot profile json | templates dir> [--frames 50]
+    python Benchmarks/LootBenchmark.py check
+
+Frames are PNG screenshots of the loot area, as written by LootMatchBenchmark.py record.
+The ground truth is truth.json in the frames directory, the top-left corner of every
+item in capture pixels by frame file name and item image path:
+    {"frame_00000.png": {"Images/Loot/gold.png": [[120, 48], [160, 48]]}}
+generate writes synthetic frames and their truth.json, for a run without recordings.
+check does a generate and a run on random item images in a temporary directory, to
+confirm the looting code imports and detects headless, without pywin32 or a game window.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import cv2 as cv
+import numpy as np
+
+import Addresses
+import Looting.LootingThread as LootingThread
+from Benchmarks.LootMatchBenchmark import template_paths, synthetic_frames, score
+from Functions.VisionFunctions import load_item_templates
+
+STAGES = ('decode', 'preprocess', 'match', 'slots', 'grid')
+
+
+class StageTimer:
+    """Wraps methods of a LootThread to add up their time per stage"""
+
+    def __init__(self):
+        self.totals = dict.fromkeys(STAGES, 0.0)
+
+    def wrap(self, owner, name, stage):
+        function = getattr(owner, name)
+
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.totals[stage] += time.perf_counter() - started
+        setattr(owner, name, timed)
+
+    def add(self, stage, elapsed):
+        self.totals[stage] += elapsed
+
+
+def load_truth(frames_dir):
+    with open(os.path.join(frames_dir, "truth.json"), 'r') as f:
+        truth = json.load(f)
+    return {name: {path: [tuple(position) for position in positions] for path, positions in items.items()}
+            for name, items in truth.items()}
+
+
+def loot_data(source):
+    return [{"ImagePath": path, "Action": "RightClick"} for path in template_paths(source)]
+
+
+def run_variant(mode, threshold, frames, data):
+    """(hits per frame by image path, prepare seconds, detection seconds, StageTimer) of one configuration"""
+    Addresses.loot_matching = mode
+    Addresses.collect_threshold = threshold
+    # Slot grids learnt by a previous variant must not leak into this one
+    LootingThread.slot_grids.clear()
+    thread = LootingThread.LootThread(data, 0)
+    started = time.perf_counter()
+    thread.prepare_templates()
+    prepare_time = time.perf_counter() - started
+
+    timer = StageTimer()
+    timer.wrap(thread, 'preprocess', 'preprocess')
+    timer.wrap(thread.matcher, 'match_all', 'match')
+    if thread.slots is not None:
+        timer.wrap(thread.slots, 'classify', 'slots')
+        timer.wrap(thread.slots, 'learn_grid', 'grid')
+
+    hits = []
+    started = time.perf_counter()
+    for path in frames:
+        decode_started = time.perf_counter()
+        gray = cv.cvtColor(cv.imread(path), cv.COLOR_BGR2GRAY)
+        timer.add('decode', time.perf_counter() - decode_started)
+        height, width = gray.shape
+        hits.append(thread.detect_items(gray, [(0, 0, width, height)], (0, 0, width, height)))
+    return hits, prepare_time, time.perf_counter() - started, timer
+
+
+def run(args):
+    data = loot_data(args.templates)
+    if not data:
+        print("No templates found")
+        return
+    truth = load_truth(args.frames_dir)
+    names = sorted(truth)
+    if not names:
+        print("No frames in truth.json")
+        return
+    frames = [os.path.join(args.frames_dir, name) for name in names]
+    paths = [entry["ImagePath"] for entry in data]
+    expected = [[truth[name].get(path, []) for path in paths] for name in names]
+    print(f"{len(frames)} frames, {len(paths)} items, tolerance {args.tolerance} px")
+
+    for mode in args.modes:
+        for threshold in args.thresholds:
+            hits, prepare_time, elapsed, timer = run_variant(mode, threshold, frames, data)
+            found = [[frame_hits.get(path, []) for path in paths] for frame_hits in hits]
+            true_positives, false_positives, false_negatives = score(expected, found, args.tolerance)
+            precision = true_positives / (true_positives + false_positives) if true_positives + false_positives else 1.0
+            recall = true_positives / (true_positives + false_negatives) if true_positives + false_negatives else 1.0
+            print(f"{mode}, threshold {threshold}: {len(frames) / elapsed:.1f} frames/s, "
+                  f"prepare_templates {prepare_time * 1000:.0f} ms")
+            print(f"  precision {precision:.3f}, recall {recall:.3f} "
+                  f"({true_positives} found, {false_positives} extra, {false_negatives} missed)")
+            print("  " + ", ".join(f"{stage} {total / len(frames) * 1000:.1f}"
+                                   for stage, total in timer.totals.items() if total) + " ms/frame")
+
+
+def generate(args):
+    templates = []
+    owners = []
+    for path in template_paths(args.templates):
+        for template in load_item_templates(path, blur=False):
+            templates.append(template)
+            owners.append(path)
+    if not templates:
+        print("No templates found")
+        return
+    frames, positions = synthetic_frames(templates, args.frames)
+    os.makedirs(args.frames_dir, exist_ok=True)
+    truth = {}
+    for index, (frame, frame_positions) in enumerate(zip(frames, positions)):
+        name = f"frame_{index:05d}.png"
+        cv.imwrite(os.path.join(args.frames_dir, name), frame)
+        items = truth[name] = {}
+        for owner, template_positions in zip(owners, frame_positions):
+            if template_positions:
+                items.setdefault(owner, []).extend(template_positions)
+    with open(os.path.join(args.frames_dir, "truth.json"), 'w') as f:
+        json.dump(truth, f, indent=4)
+    print(f"{len(frames)} frames and truth.json written to {args.frames_dir}")
+
+
+def check(args):
+    with tempfile.TemporaryDirectory() as directory:
+        templates_dir = os.path.join(directory, "templates")
+        frames_dir = os.path.join(directory, "frames")
+        os.makedirs(templates_dir)
+        rng = np.random.default_rng(1)
+        for index in range(3):
+            # Blocky like a sprite, pixel noise does not survive the matching blur
+            item = cv.resize(rng.integers(0, 256, (8, 8, 3), dtype=np.uint8), (32, 32), interpolation=cv.INTER_NEAREST)
+            cv.imwrite(os.path.join(templates_dir, f"item_{index}.png"), item)
+        generate(argparse.Namespace(frames_dir=frames_dir, templates=templates_dir, frames=args.frames))
+        run(argparse.Namespace(frames_dir=frames_dir, templates=templates_dir, modes=[Addresses.loot_matching],
+                               thresholds=[Addresses.collect_threshold], tolerance=2))
+    print("Headless check passed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the LootThread item detection against ground truth")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="detect the items of recorded frames and score them")
+    run_parser.add_argument("frames_dir", help="directory of PNG frames and truth.json")
+    run_parser.add_argument("templates", help="loot profile JSON or directory of item images")
+    run_parser.add_argument("--modes", nargs="+", default=[Addresses.loot_matching],
+                            choices=["native", "upscaled", "slots"])
+    run_parser.add_argument("--thresholds", type=float, nargs="+", default=[Addresses.collect_threshold])
+    run_parser.add_argument("--tolerance", type=float, default=2, help="capture pixels")
+
+    generate_parser = commands.add_parser("generate", help="write synthetic frames with their truth.json")
+    generate_parser.add_argument("frames_dir")
+    generate_parser.add_argument("templates", help="loot profile JSON or directory of item images")
+    generate_parser.add_argument("--frames", type=int, default=50)
+
+    check_parser = commands.add_parser("check", help="generate and run on random items, to check it works headless")
+    check_parser.add_argument("--frames", type=int, default=5)
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    elif args.command == "generate":
+        generate(args)
+    else:
+        check(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+"""
+Accuracy and speed of the loot template matching modes on recorded frames.
+The upscaled mode (the original 3x pipeline) is the reference, the native mode is
+scored against its hits with a tolerance of --tolerance capture pixels.
+
+Usage:
+    python Benchmarks/LootMatchBenchmark.py record <frames dir> --window TITLE --region X Y W H [--frames 100] [--interval 0.5]
+    python Benchmarks/LootMatchBenchmark.py compare <frames dir> <loot profile json | templates dir> [--threshold 0.85] [--workers N]
+    python Benchmarks/LootMatchBenchmark.py compare --synthetic 50 <loot profile json | templates dir>
+
+Frames are PNG screenshots of the loot area. --synthetic pastes the templates on
+generated backgrounds instead, for a run without recordings.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import cv2 as cv
+import numpy as np
+
+import Addresses
+from Functions.VisionFunctions import TemplateMatcher, MatchExecutor, load_item_templates
+
+IMAGE_EXTENSIONS = ('.png', '.gif', '.jpg', '.bmp')
+
+
+def template_paths(source):
+    if os.path.isdir(source):
+        return sorted(path for path in glob.glob(os.path.join(source, '*')) if path.lower().endswith(IMAGE_EXTENSIONS))
+    with open(source, 'r') as f:
+        return [entry["ImagePath"] for entry in json.load(f).get("loot", []) if entry.get("ImagePath")]
+
+
+def load_frames(directory):
+    paths = sorted(glob.glob(os.path.join(directory, '*.png')))
+    return [cv.cvtColor(cv.imread(path), cv.COLOR_BGR2GRAY) for path in paths]
+
+
+def synthetic_frames(templates, count, width=480, height=352, seed=1):
+    """
+    Gray backgrounds with items pasted on a 40 px slot grid, like open containers.
+    Returns the frames and, per frame and template, the positions it was pasted at.
+    """
+    rng = np.random.default_rng(seed)
+    frames = []
+    truth = []
+    for _ in range(count):
+        frame = cv.GaussianBlur((rng.random((height, width)) * 80 + 20).astype(np.uint8), (5, 5), 0)
+        positions = [[] for _ in templates]
+        for slot_y in range(8, height - 32, 40):
+            for slot_x in range(8, width - 32, 40):
+                if rng.random() < 0.4:
+                    continue
+                index = int(rng.integers(len(templates)))
+                th, tw = templates[index].shape
+                frame[slot_y:slot_y + th, slot_x:slot_x + tw] = templates[index]
+                positions[index].append((slot_x, slot_y))
+        frames.append(frame)
+        truth.append(positions)
+    return frames, truth
+
+
+def run_mode(mode, frames, templates, threshold, executor=None, fft='never'):
+    matcher = TemplateMatcher(resize_factor=3, mode=mode, fft=fft)
+    prepared = [matcher.prepare(cv.GaussianBlur(template, (7, 7), 0)) for template in templates]
+    hits = []
+    started = time.perf_counter()
+    for frame in frames:
+        matcher.set_images([(0, 0, cv.GaussianBlur(frame, (7, 7), 0))])
+        hits.append(matcher.match_all(prepared, threshold, executor))
+    return hits, time.perf_counter() - started
+
+
+def score(reference, candidate, tolerance):
+    """(true positives, false positives, false negatives) of candidate hits against the reference"""
+    true_positives = false_positives = false_negatives = 0
+    for frame_reference, frame_candidate in zip(reference, candidate):
+        for expected, found in zip(frame_reference, frame_candidate):
+            unmatched = list(found)
+            for ex, ey in expected:
+                match = next((hit for hit in unmatched if abs(hit[0] - ex) <= tolerance and abs(hit[1] - ey) <= tolerance), None)
+                if match is None:
+                    false_negatives += 1
+                else:
+                    unmatched.remove(match)
+                    true_positives += 1
+            false_positives += len(unmatched)
+    return true_positives, false_positives, false_negatives
+
+
+def record(args):
+    from Functions.GeneralFunctions import capture_session
+    Addresses.game_name = args.window
+    x, y, w, h = args.region
+    capture = capture_session(w, h, x, y)
+    os.makedirs(args.frames_dir, exist_ok=True)
+    for index in range(args.frames):
+        frame = capture.get_screenshot()
+        cv.imwrite(os.path.join(args.frames_dir, f"frame_{index:05d}.png"), frame)
+        time.sleep(args.interval)
+    print(f"{args.frames} frames written to {args.frames_dir}")
+
+
+def compare(args):
+    # Unblurred, both modes blur the templates and the frames like LootThread
+    templates = []
+    for path in template_paths(args.templates):
+        templates.extend(load_item_templates(path, blur=False))
+    if not templates:
+        print("No templates found")
+        return
+    truth = None
+    if args.synthetic:
+        frames, truth = synthetic_frames(templates, args.synthetic)
+    else:
+        frames = load_frames(args.frames_dir)
+    if not frames:
+        print("No frames found")
+        return
+    pixels = sum(frame.size for frame in frames)
+    print(f"{len(frames)} frames ({pixels / len(frames) / 1000:.0f} kpx each), {len(templates)} templates, "
+          f"threshold {args.threshold}")
+
+    executor = MatchExecutor(args.workers)
+    reference, reference_time = run_mode('upscaled', frames, templates, args.threshold)
+    native, native_time = run_mode('native', frames, templates, args.threshold)
+    parallel, parallel_time = run_mode('native', frames, templates, args.threshold, executor)
+    fft, fft_time = run_mode('native', frames, templates, args.threshold, fft='always')
+    automatic, automatic_time = run_mode('native', frames, templates, args.threshold, executor, fft='auto')
+    executor.shutdown()
+
+    for name, elapsed in (('upscaled', reference_time), ('native', native_time),
+                          (f'native, {executor.workers} workers', parallel_time),
+                          ('native, FFT', fft_time), (f'native, auto, {executor.workers} workers', automatic_time)):
+        print(f"  {name:<27} {elapsed / len(frames) * 1000:8.1f} ms/frame  {len(frames) / elapsed:7.1f} frames/s")
+    print(f"  speedup {reference_time / native_time:.1f}x native, {reference_time / parallel_time:.1f}x native in parallel")
+    if parallel != native:
+        print("  parallel hits differ from serial hits")
+    comparisons = [('FFT vs spatial', native, fft), ('auto vs spatial', native, automatic)]
+    comparisons += [('native vs upscaled', reference, native)]
+    if truth is not None:
+        comparisons += [('upscaled vs truth', truth, reference), ('native vs truth', truth, native)]
+    for name, expected, found in comparisons:
+        true_positives, false_positives, false_negatives = score(expected, found, args.tolerance)
+        precision = true_positives / (true_positives + false_positives) if true_positives + false_positives else 1.0
+        recall = true_positives / (true_positives + false_negatives) if true_positives + false_negatives else 1.0
+        print(f"  {name:<19} {true_positives} matching hits, {false_positives} extra, {false_negatives} missed, "
+              f"precision {precision:.3f}, recall {recall:.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the loot template matching modes")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="save frames of a region of the game window")
+    record_parser.add_argument("frames_dir")
+    record_parser.add_argument("--window", required=True, help="game window title")
+    record_parser.add_argument("--region", type=int, nargs=4, metavar=("X", "Y", "W", "H"), required=True)
+    record_parser.add_argument("--frames", type=int, default=100)
+    record_parser.add_argument("--interval", type=float, default=0.5, help="seconds between frames")
+
+    compare_parser = commands.add_parser("compare", help="run both matching modes over frames")
+    compare_parser.add_argument("frames_dir", nargs="?")
+    compare_parser.add_argument("templates", help="loot profile JSON or directory of item images")
+    compare_parser.add_argument("--synthetic", type=int, metavar="N", help="generate N frames instead of reading frames_dir")
+    compare_parser.add_argument("--threshold", type=float, default=Addresses.collect_threshold)
+    compare_parser.add_argument("--tolerance", type=float, default=2, help="capture pixels")
+    compare_parser.add_argument("--workers", type=int, default=Addresses.match_workers,
+                                help="matching threads, 0 uses every available core but one")
+
+    args = parser.parse_args()
+    if args.command == "record":
+        record(args)
+    else:
+        compare(args)
+
+
+if __name__ == '__main__':
+    main()
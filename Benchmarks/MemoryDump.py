@@ -0,0 +1,122 @@
+"""
+Records the memory the bot reads from a running client and replays it without the game.
+Addresses come from Save/Settings/addresses.json, like in the bot.
+
+Usage:
+    python Benchmarks/MemoryDump.py record <pid> <dump file> [--seconds 60] [--rate 20] [--base HEX]
+    python Benchmarks/MemoryDump.py replay <dump file> [--speed X] [--stats FILE]
+
+replay steps through every frame and times read_game_snapshot and read_target_info_direct.
+The printed digest only depends on the dump, so two runs over the same dump can be compared.
+With --speed the dump is played back in real time (or X times faster) at state_poll_interval.
+"""
+import argparse
+import hashlib
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import Addresses
+from Functions.MemoryFunctions import read_game_snapshot, read_target_info_direct, relevant_memory_ranges
+from Functions.InstrumentationFunctions import memory_stats
+from Platform.PlatformAbstraction import memory_api
+from Platform.MemoryReplay import MemoryDumpRecorder, ReplayMemoryAPI
+
+
+def record(args):
+    Addresses.load_custom_addresses()
+    Addresses.process_handle = memory_api.open_process(args.pid)
+    Addresses.base_address = int(args.base, 16) if args.base else memory_api.get_base_address(Addresses.process_handle)
+    recorder = MemoryDumpRecorder(args.dump, Addresses.process_handle, relevant_memory_ranges,
+                                  Addresses.base_address, args.rate)
+    print(f"Recording {args.seconds} s at {args.rate} frames/s, base address {Addresses.base_address:#x}")
+    try:
+        recorder.record(args.seconds)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        recorder.close()
+    print(f"{recorder.frame_count} frames, {os.path.getsize(args.dump) / 1024:.0f} KB written to {args.dump}")
+
+
+def percentile(timings, fraction):
+    return sorted(timings)[min(len(timings) - 1, int(len(timings) * fraction))] if timings else 0
+
+
+def replay(args):
+    replay_api = ReplayMemoryAPI(args.dump, speed=args.speed, loop=False)
+    memory_api.use_replay(replay_api)
+    Addresses.load_custom_addresses()
+    Addresses.process_handle = 0
+    Addresses.base_address = replay_api.base_address
+    # Frames jump ahead of the pointer cache clock, so resolve chains on every read
+    Addresses.pointer_cache_interval = 0
+    if args.stats:
+        memory_stats.enable()
+
+    functions = (('read_game_snapshot', read_game_snapshot), ('read_target_info_direct', read_target_info_direct))
+    timings = {name: [] for name, function in functions}
+    digest = hashlib.sha256()
+    frames = 0
+    started = time.perf_counter()
+
+    def run_frame():
+        for name, function in functions:
+            begin = time.perf_counter_ns()
+            value = function()
+            timings[name].append(time.perf_counter_ns() - begin)
+            if name == 'read_game_snapshot' and value is not None:
+                value = value[:-1]  # Timestamp differs between runs
+            digest.update(repr(value).encode())
+
+    if args.speed is None:
+        while True:
+            run_frame()
+            frames += 1
+            if not replay_api.step():
+                break
+    else:
+        deadline = time.monotonic() + replay_api.duration / args.speed
+        while time.monotonic() < deadline:
+            run_frame()
+            frames += 1
+            time.sleep(Addresses.state_poll_interval / 1000)
+
+    elapsed = time.perf_counter() - started
+    print(f"{frames} frames in {elapsed:.2f} s ({replay_api.duration:.1f} s recorded)")
+    for name, values in timings.items():
+        average = sum(values) / len(values) / 1000 if values else 0
+        print(f"  {name:<25} avg {average:8.1f} us  p99 {percentile(values, 0.99) / 1000:8.1f} us")
+    if args.speed is None:
+        print(f"digest {digest.hexdigest()[:16]}")
+    if args.stats:
+        print(f"Memory stats written to {memory_stats.dump(args.stats)}")
+    memory_api.use_replay(None)
+    replay_api.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and replay memory dumps of the game client")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="record a dump from a running client")
+    record_parser.add_argument("pid", type=int)
+    record_parser.add_argument("dump")
+    record_parser.add_argument("--seconds", type=float, default=60)
+    record_parser.add_argument("--rate", type=float, default=20, help="frames per second")
+    record_parser.add_argument("--base", help="base address in hex, detected when omitted")
+
+    replay_parser = commands.add_parser("replay", help="run the memory reads over a dump")
+    replay_parser.add_argument("dump")
+    replay_parser.add_argument("--speed", type=float, help="real time playback speed, frame by frame when omitted")
+    replay_parser.add_argument("--stats", metavar="FILE", help="write memory read stats as JSON")
+
+    args = parser.parse_args()
+    if args.command == "record":
+        record(args)
+    else:
+        replay(args)
+
+
+if __name__ == '__main__':
+    main()
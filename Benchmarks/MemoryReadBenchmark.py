@@ -0,0 +1,103 @@
+"""
+Micro-benchmark of the memory read path.
+Compares the allocating read used before MemoryReader (new iovec class, structs,
+ctypes buffer and cast per value, reimplemented here) with MemoryReader, reading this process' own memory so no game is needed.
+
+Usage: python Benchmarks/MemoryReadBenchmark.py [seconds per case]
+"""
+import ctypes as c
+import os
+import struct
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Platform.PlatformAbstraction import memory_api, MemoryReader, IS_WINDOWS
+
+
+# Own libc handle without argtypes: the baseline declared POINTER(c_void_p) for the iovecs,
+# which ctypes rejects for byref(iovec), so its calls failed after paying the setup below
+baseline_libc = None if IS_WINDOWS else c.CDLL('libc.so.6')
+
+
+def baseline_read_process_memory(process_handle, address, buffer, size):
+    """MemoryAPI.read_process_memory before MemoryReader: new iovec class and structs per call"""
+    if IS_WINDOWS:
+        return bool(c.windll.kernel32.ReadProcessMemory(process_handle, c.c_void_p(address), buffer, size,
+                                                        c.byref(c.c_size_t())))
+
+    class iovec(c.Structure):
+        _fields_ = [
+            ("iov_base", c.c_void_p),
+            ("iov_len", c.c_size_t)
+        ]
+
+    local = iovec(c.cast(buffer, c.c_void_p), size)
+    remote = iovec(c.c_void_p(address), size)
+    return baseline_libc.process_vm_readv(process_handle, c.byref(local), 1, c.byref(remote), 1, 0) == size
+
+
+def allocating_read(process_handle, address):
+    """read_memory_address before MemoryReader: new ctypes buffer and cast per value"""
+    buffer = c.create_string_buffer(4)
+    if not baseline_read_process_memory(process_handle, address, buffer, 4):
+        return None
+    return c.cast(buffer, c.POINTER(c.c_int)).contents.value
+
+
+def run_case(name, function, duration, unit="reads/s"):
+    count = 0
+    started = time.perf_counter()
+    deadline = started + duration
+    while time.perf_counter() < deadline:
+        for _ in range(1000):
+            function()
+        count += 1000
+    rate = count / (time.perf_counter() - started)
+    print(f"{name:<45} {rate:>12,.0f} {unit}")
+    return rate
+
+
+def main():
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    if IS_WINDOWS:
+        process_handle = memory_api.open_process(os.getpid())
+    else:
+        process_handle = os.getpid()
+
+    # Fake player stats living in our own memory
+    stats = (c.c_int * 8)(150, 200, 80, 100, 1000, 2000, 7, 42)
+    addresses = [c.addressof(stats) + i * 4 for i in range(8)]
+    int_struct = struct.Struct('<i')
+    reader = MemoryReader()
+    batch, offsets = reader.prepare([(address, 4) for address in addresses])
+
+    def reader_read():
+        reader.read(process_handle, addresses[0], 4)
+        return int_struct.unpack_from(reader.view)[0]
+
+    def allocating_snapshot():
+        return [allocating_read(process_handle, address) for address in addresses]
+
+    def batch_snapshot():
+        reader.read_batch(process_handle, batch)
+        return [int_struct.unpack_from(reader.view, offset)[0] for offset in offsets]
+
+    assert reader_read() == allocating_read(process_handle, addresses[0]) == 150
+    assert batch_snapshot() == allocating_snapshot() == list(stats)
+
+    print("Single value")
+    before = run_case("  iovec class + create_string_buffer + cast", lambda: allocating_read(process_handle, addresses[0]), duration)
+    after = run_case("  MemoryReader.read + unpack_from", reader_read, duration)
+    print(f"  speedup: {after / before:.2f}x")
+    print("Eight value snapshot")
+    before = run_case("  8 x iovec class + buffer + cast", allocating_snapshot, duration, "snapshots/s")
+    after = run_case("  MemoryReader.read_batch", batch_snapshot, duration, "snapshots/s")
+    print(f"  speedup: {after / before:.2f}x")
+    if not IS_WINDOWS:
+        print("Linux backends (2000 x 64 byte reads)")
+        for name, seconds in memory_api.benchmark_backends(process_handle, addresses[0]).items():
+            print(f"  {name:<43} {seconds * 1000:>9.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
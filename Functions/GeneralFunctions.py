@@ -12,15 +12,10 @@ import Addresses
 import os
 import json
 import sys
+import threading
+import time
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from Platform.PlatformAbstraction import screen_api, window_api, IS_WINDOWS
-
-if IS_WINDOWS:
-    import win32con
-    import win32gui
-    import win32ui
-else:
-    from Platform.PlatformAbstraction import win32con, win32gui
+from Platform.PlatformAbstraction import screen_api, window_api
 
 
 def load_items_images(list_widget) -> None:
@@ -41,55 +36,256 @@ def load_items_images(list_widget) -> None:
         Addresses.item_list[item_name].append(loot_container)
 
 
-def merge_close_points(points, distance_threshold):
-    merged_points = []
-    merged_indices = set()
-
-    def merge_distance(point1, point2):
-        return np.sqrt(np.sum((point1 - point2) ** 2))
-    for i in range(len(points)):
-        if i not in merged_indices:
-            current_point = points[i]
-            merged_point = np.array(current_point)
-            for j in range(i + 1, len(points)):
-                if merge_distance(np.array(current_point), np.array(points[j])) < distance_threshold:
-                    merged_point = (merged_point + np.array(points[j])) / 2
-                    merged_indices.add(j)
-            merged_points.append(tuple(merged_point))
-    return merged_points
-
-
 class WindowCapture:
-    def __init__(self, w, h, x, y):
-        window_name = Addresses.game_name
-        self.hwnd = window_api.find_window(window_title=window_name)
+    """
+    Capture session of a region of the game window, get one with capture_session().
+    Keeps the window handle and its size between captures and only looks the window
+    up again when it disappears or is resized.
+    """
+    # Seconds between checks of the window size
+    GEOMETRY_INTERVAL = 1.0
+
+    def __init__(self, w, h, x, y, hwnd=None):
+        self.hwnd = hwnd if hwnd is not None else find_game_window()
         self.w = w
         self.h = h
         self.x = x
         self.y = y
+        self.size = self.window_size()
+        self.checked = time.monotonic()
+        # Capture buffer of every thread using the session
+        self.buffers = threading.local()
+
+    def window_size(self):
+        try:
+            left, top, right, bottom = window_api.get_window_rect(self.hwnd)
+            return right - left, bottom - top
+        except Exception:
+            return None
+
+    def resolve(self):
+        """Looks the game window up again and moves a registered session to its new key"""
+        old_key = (self.hwnd, self.x, self.y, self.w, self.h)
+        self.hwnd = find_game_window(refresh=True)
+        self.size = self.window_size()
+        with capture_sessions_lock:
+            if capture_sessions.get(old_key) is self:
+                del capture_sessions[old_key]
+                capture_sessions.setdefault((self.hwnd, self.x, self.y, self.w, self.h), self)
+
+    def capture(self, out=None):
+        """
+        Captures the region from the window, bypassing frame_store. The frame is written
+        into out when given, else into the calling thread's buffer, overwritten by its
+        next capture of this session.
+        """
+        now = time.monotonic()
+        if now - self.checked >= self.GEOMETRY_INTERVAL:
+            self.checked = now
+            size = self.window_size()
+            if size is None or size != self.size:
+                self.resolve()
+        buffer = out if out is not None else getattr(self.buffers, 'frame', None)
+        if buffer is None:
+            buffer = self.buffers.frame = np.empty((self.h, self.w, 4), dtype=np.uint8)
+        try:
+            return screen_api.capture_window(self.hwnd, self.x, self.y, self.w, self.h, buffer)
+        except Exception:
+            # Window closed or recreated by the client
+            self.resolve()
+            return screen_api.capture_window(self.hwnd, self.x, self.y, self.w, self.h, buffer)
+
+    def get_frame(self):
+        """
+        (frame, sequence) with the raw (h, w, 4) BGRA frame of the region, a view that
+        later captures may overwrite. Comes from the latest frame of the frame service
+        when it is running, sequence is then its sequence number and 0 for a direct capture.
+        """
+        shared = frame_store.view(self.x, self.y, self.w, self.h)
+        if shared is not None:
+            sequence, frame = shared
+            return frame, sequence
+        return self.capture(), 0
 
     def get_screenshot(self):
-        if IS_WINDOWS:
-            wDC = win32gui.GetWindowDC(self.hwnd)
-            dc_obj = win32ui.CreateDCFromHandle(wDC)
-            cDC = dc_obj.CreateCompatibleDC()
-            data_bitmap = win32ui.CreateBitmap()
-            data_bitmap.CreateCompatibleBitmap(dc_obj, self.w, self.h)
-            cDC.SelectObject(data_bitmap)
-            cDC.BitBlt((0, 0), (self.w, self.h), dc_obj, (self.x, self.y), win32con.SRCCOPY)
-            signed_ints_array = data_bitmap.GetBitmapBits(True)
-            img = np.frombuffer(signed_ints_array, dtype='uint8')
-            img.shape = (self.h, self.w, 4)
-            dc_obj.DeleteDC()
-            cDC.DeleteDC()
-            win32gui.ReleaseDC(self.hwnd, wDC)
-            win32gui.DeleteObject(data_bitmap.GetHandle())
-        else:
-            img = screen_api.capture_window(self.hwnd, self.x, self.y, self.w, self.h)
-        
-        img = img[..., :3]
-        img = np.ascontiguousarray(img)
-        return img
+        # Drops the alpha channel into a new contiguous BGR image in one pass
+        return cv.cvtColor(self.get_frame()[0], cv.COLOR_BGRA2BGR)
+
+
+# (hwnd, x, y, w, h) -> WindowCapture, shared by every thread capturing that region
+capture_sessions = {}
+capture_sessions_lock = threading.Lock()
+# Window title -> handle, find_window enumerates every top-level window on Linux
+game_windows = {}
+
+
+def find_game_window(refresh=False):
+    window_name = Addresses.game_name
+    if refresh or window_name not in game_windows:
+        game_windows[window_name] = window_api.find_window(window_title=window_name)
+    return game_windows[window_name]
+
+
+def capture_session(w, h, x, y) -> WindowCapture:
+    """Persistent WindowCapture of a region of the game window, registered with frame_store"""
+    hwnd = find_game_window()
+    key = (hwnd, x, y, w, h)
+    with capture_sessions_lock:
+        session = capture_sessions.get(key)
+    if session is None:
+        session = WindowCapture(w, h, x, y, hwnd)
+        with capture_sessions_lock:
+            session = capture_sessions.setdefault(key, session)
+        frame_store.register(x, y, w, h)
+    return session
+
+
+class FrameStore:
+    """
+    Ring buffer of the latest captures of the game window, filled by FrameServiceThread.
+    The service grabs the bounding box of every registered region once per frame and
+    WindowCapture.get_frame() answers with a view of the latest frame instead of
+    capturing again. A view stays valid for Addresses.frame_ring_size frames.
+    """
+    # Seconds without a get_frame() after which the service stops capturing
+    IDLE_TIMEOUT = 1.0
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.regions = set()
+        self.ring = None
+        self.sequence = 0
+        # (sequence, timestamp, x, y, frame) of the latest published frame
+        self.latest = None
+        self.max_age = 0
+        self.last_request = 0
+
+    def register(self, x, y, w, h):
+        with self.condition:
+            self.regions.add((x, y, w, h))
+
+    def bounds(self):
+        """Bounding box (x, y, w, h) of the registered regions, None when nobody asked for a frame lately"""
+        with self.condition:
+            if not self.regions or time.monotonic() - self.last_request > self.IDLE_TIMEOUT:
+                return None
+            left = min(x for x, y, w, h in self.regions)
+            top = min(y for x, y, w, h in self.regions)
+            right = max(x + w for x, y, w, h in self.regions)
+            bottom = max(y + h for x, y, w, h in self.regions)
+            return left, top, right - left, bottom - top
+
+    def next_slot(self, shape):
+        """Ring slot the next frame of the given shape is captured into before publish()"""
+        ring_size = max(1, Addresses.frame_ring_size)
+        if self.ring is None or self.ring.shape != (ring_size,) + shape:
+            # Views of the old ring stay valid, numpy keeps it alive
+            self.ring = np.empty((ring_size,) + shape, dtype=np.uint8)
+        return self.ring[(self.sequence + 1) % ring_size]
+
+    def publish(self, slot, x, y, timestamp, max_age):
+        """Publishes the slot from next_slot(), captured at (x, y) of the window, without copying it"""
+        with self.condition:
+            self.sequence += 1
+            self.latest = (self.sequence, timestamp, x, y, slot)
+            self.max_age = max_age
+            self.condition.notify_all()
+
+    def stop_publishing(self):
+        with self.condition:
+            self.latest = None
+            self.condition.notify_all()
+
+    def view(self, x, y, w, h):
+        """(sequence, view) of the region in the latest fresh frame, None if it is stale or does not cover it"""
+        self.last_request = now = time.monotonic()
+        latest = self.latest
+        if latest is None:
+            return None
+        sequence, timestamp, frame_x, frame_y, frame = latest
+        if now - timestamp > self.max_age:
+            return None
+        left = x - frame_x
+        top = y - frame_y
+        if left < 0 or top < 0 or left + w > frame.shape[1] or top + h > frame.shape[0]:
+            return None
+        return sequence, frame[top:top + h, left:left + w]
+
+    def wait_for_frame(self, sequence, timeout):
+        """Blocks until a frame newer than sequence is published or timeout (seconds) expires"""
+        with self.condition:
+            return self.condition.wait_for(lambda: self.latest is not None and self.latest[0] > sequence, timeout)
+
+
+frame_store = FrameStore()
+
+
+class FrameChangeDetector:
+    """
+    Tile-wise change detection of a capture region between two passes of a vision loop.
+    changed_regions() returns the (x, y, w, h) rectangles that have to be processed again,
+    grown by margin so every match touching a changed tile lies inside one of them.
+    Everything is reported as changed every full_interval seconds, so a click that
+    did not change the screen gets retried.
+    """
+
+    def __init__(self, tile=32, full_interval=2.0):
+        self.tile = tile
+        self.full_interval = full_interval
+        self.previous = None
+        self.sequence = 0
+        self.full_at = 0
+
+    def reset(self):
+        self.previous = None
+        self.sequence = 0
+
+    def changed_regions(self, image, margin=0, sequence=0):
+        """image is a 2D (gray) array, sequence its frame_store sequence number or 0"""
+        h, w = image.shape[:2]
+        now = time.monotonic()
+        if self.previous is None or self.previous.shape != image.shape or now - self.full_at >= self.full_interval:
+            self.previous = image.copy()
+            self.sequence = sequence
+            self.full_at = now
+            return [(0, 0, w, h)]
+        if sequence and sequence == self.sequence:
+            return []
+        self.sequence = sequence
+
+        tile = self.tile
+        rows = -(-h // tile)
+        cols = -(-w // tile)
+        changed = np.zeros((rows * tile, cols * tile), dtype=bool)
+        np.not_equal(image, self.previous, out=changed[:h, :w])
+        tiles = changed.reshape(rows, tile, cols, tile).any(axis=(1, 3))
+        if not tiles.any():
+            return []
+        np.copyto(self.previous, image)
+
+        # Runs of changed tiles per row, merged with the same run of the row above
+        rectangles = []
+        open_runs = {}
+        for row in range(rows):
+            runs = {}
+            flags = np.flatnonzero(np.diff(np.concatenate(([0], tiles[row].view(np.int8), [0]))))
+            for start, end in zip(flags[::2].tolist(), flags[1::2].tolist()):
+                top = open_runs.pop((start, end), row)
+                runs[(start, end)] = top
+            for (start, end), top in open_runs.items():
+                rectangles.append((start, top, end, row))
+            open_runs = runs
+        rectangles.extend((start, top, end, rows) for (start, end), top in open_runs.items())
+
+        regions = []
+        for start, top, end, bottom in rectangles:
+            x = max(0, start * tile - margin)
+            y = max(0, top * tile - margin)
+            regions.append((x, y, min(w, end * tile + margin) - x, min(h, bottom * tile + margin) - y))
+        # Many small regions cost more than one full pass
+        if sum(rw * rh for x, y, rw, rh in regions) >= w * h // 2:
+            return [(0, 0, w, h)]
+        return regions
 
 
 def delete_item(list_widget, item) -> None:
@@ -0,0 +1,205 @@
+import functools
+import json
+import os
+import sys
+import threading
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Platform.PlatformAbstraction import memory_api, MemoryReader
+
+# Latency buckets are powers of two in microseconds: <1, 1, 2-3, 4-7, ... up to ~34 s
+HISTOGRAM_BUCKETS = 26
+
+
+class SiteStats:
+    """Counters of one (function, call site) pair"""
+
+    __slots__ = ('calls', 'failures', 'bytes', 'total_ns', 'max_ns', 'histogram')
+
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.bytes = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.histogram = [0] * HISTOGRAM_BUCKETS
+
+    def percentile(self, fraction):
+        """Upper bound in microseconds of the bucket holding the given fraction of calls"""
+        wanted = self.calls * fraction
+        seen = 0
+        for bucket, count in enumerate(self.histogram):
+            seen += count
+            if count and seen >= wanted:
+                return 1 << bucket
+        return 0
+
+    def to_dict(self):
+        histogram = {}
+        for bucket, count in enumerate(self.histogram):
+            if count:
+                if bucket < 2:
+                    label = ("<1", "1")[bucket]
+                else:
+                    label = f"{1 << (bucket - 1)}-{(1 << bucket) - 1}"
+                histogram[label] = count
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "bytes": self.bytes,
+            "avg_us": round(self.total_ns / self.calls / 1000, 2) if self.calls else 0,
+            "max_us": round(self.max_ns / 1000, 2),
+            "p50_us": self.percentile(0.5),
+            "p99_us": self.percentile(0.99),
+            "histogram_us": histogram,
+        }
+
+
+class MemoryReadStats:
+    """
+    Opt-in counters of memory reads per call site.
+    While disabled the instrumented functions only check self.enabled, and
+    the MemoryAPI read methods and MemoryReader are not wrapped at all.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.sites = {}
+        self.started = None
+        self.patched = []
+
+    def enable(self):
+        with self.lock:
+            if self.enabled:
+                return
+            self.enabled = True
+            self.started = time.time()
+            # Platform reads are only wrapped while enabled, so they cost nothing otherwise
+            self.patch(memory_api, 'read_process_memory', read_process_memory_size)
+            self.patch(memory_api, 'read_process_memory_vectored', vectored_read_size, vectored_read_succeeded)
+            self.patch(memory_api, 'read_into', read_into_size, read_into_succeeded)
+            self.patch(MemoryReader, 'read', memory_reader_read_size)
+            self.patch(MemoryReader, 'read_batch', memory_reader_batch_size)
+
+    def disable(self):
+        with self.lock:
+            if not self.enabled:
+                return
+            self.enabled = False
+            for owner, name, original in reversed(self.patched):
+                if original is None:
+                    delattr(owner, name)
+                else:
+                    setattr(owner, name, original)
+            self.patched = []
+
+    def patch(self, owner, name, size_of, succeeded=None):
+        self.patched.append((owner, name, owner.__dict__.get(name)))
+        setattr(owner, name, instrumented(size_of, succeeded)(getattr(owner, name)))
+
+    def reset(self):
+        with self.lock:
+            self.sites = {}
+            self.started = time.time() if self.enabled else None
+
+    def record(self, function_name, site, elapsed_ns, size, ok):
+        key = (function_name, site)
+        with self.lock:
+            stats = self.sites.get(key)
+            if stats is None:
+                stats = self.sites[key] = SiteStats()
+            stats.calls += 1
+            stats.bytes += size
+            stats.total_ns += elapsed_ns
+            if elapsed_ns > stats.max_ns:
+                stats.max_ns = elapsed_ns
+            if not ok:
+                stats.failures += 1
+            stats.histogram[min((elapsed_ns // 1000).bit_length(), HISTOGRAM_BUCKETS - 1)] += 1
+
+    def to_dict(self):
+        with self.lock:
+            sites = [dict(function=function_name, site=site, **stats.to_dict())
+                     for (function_name, site), stats in self.sites.items()]
+            started = self.started
+        sites.sort(key=lambda entry: entry["calls"], reverse=True)
+        return {
+            "enabled": self.enabled,
+            "started": started,
+            "duration_s": round(time.time() - started, 3) if started else 0,
+            "sites": sites,
+        }
+
+    def dump(self, path):
+        """Writes the collected stats as JSON and returns the path"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=4)
+        return path
+
+
+memory_stats = MemoryReadStats()
+
+
+def call_site(frame):
+    return f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}:{frame.f_lineno}"
+
+
+def instrumented(size_of, succeeded=None):
+    """
+    Decorator recording calls of a read function in memory_stats while it is enabled.
+    size_of(*args, **kwargs) returns the number of bytes the call asks for.
+    A None or False result counts as a failure, or whatever succeeded(result) rejects.
+    """
+    def decorator(function):
+        name = function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not memory_stats.enabled:
+                return function(*args, **kwargs)
+            site = call_site(sys._getframe(1))
+            started = time.perf_counter_ns()
+            ok = False
+            try:
+                result = function(*args, **kwargs)
+                ok = succeeded(result) if succeeded is not None else result is not None and result is not False
+                return result
+            finally:
+                memory_stats.record(name, site, time.perf_counter_ns() - started, size_of(*args, **kwargs), ok)
+        return wrapper
+    return decorator
+
+
+def read_process_memory_size(process_handle, address, buffer, size):
+    return size
+
+
+def vectored_read_size(process_handle, requests, partial=False):
+    return sum(size for _, _, size in requests)
+
+
+def vectored_read_succeeded(result):
+    # A list of one bool per range with partial=True
+    return all(result) if isinstance(result, list) else bool(result)
+
+
+def read_into_size(process_handle, address, buffer):
+    return memoryview(buffer).nbytes
+
+
+def read_into_succeeded(bytes_read):
+    return bytes_read > 0
+
+
+def memory_reader_read_size(reader, process_handle, address, size):
+    return size
+
+
+def memory_reader_batch_size(reader, process_handle, batch):
+    if isinstance(batch, list):  # Windows batches are one (address, buffer, size) per range
+        return sum(size for _, _, size in batch)
+    return batch[3]
@@ -1,154 +1,309 @@
 import Addresses
 import ctypes as c
+import numpy as np
 import struct
 import sys
 import os
+import threading
+import time
+from collections import deque, namedtuple
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from Platform.PlatformAbstraction import memory_api, IS_WINDOWS
+from Platform.PlatformAbstraction import memory_api, MemoryReader, IS_WINDOWS
+from Functions.InstrumentationFunctions import instrumented
 
 if IS_WINDOWS:
     import win32api
     import win32con
     import win32security
 
-# Structure for VirtualQueryEx
-class MEMORY_BASIC_INFORMATION(c.Structure):
-    _fields_ = [
-        ("BaseAddress", c.c_void_p),
-        ("AllocationBase", c.c_void_p),
-        ("AllocationProtect", c.c_uint32),
-        ("RegionSize", c.c_size_t),
-        ("State", c.c_uint32),
-        ("Protect", c.c_uint32),
-        ("Type", c.c_uint32),
-    ]
 
+def value_buffer_size(option):
+    """Number of bytes read for a value of the given type option"""
+    if option == 4 or option == 5:
+        return 8
+    if option == 6 or option == 7:
+        return 64
+    return int(Addresses.application_architecture/8)
+
+
+# Precompiled decoders for the numeric address type options
+VALUE_STRUCTS = {
+    1: struct.Struct('<b'),
+    2: struct.Struct('<h'),
+    3: struct.Struct('<i'),
+    4: struct.Struct('<Q'),
+    5: struct.Struct('<d'),
+}
+POINTER_STRUCTS = {4: struct.Struct('<I'), 8: struct.Struct('<Q')}
+
+thread_readers = threading.local()
+
+
+def get_memory_reader():
+    """MemoryReader owned by the calling thread"""
+    reader = getattr(thread_readers, 'reader', None)
+    if reader is None:
+        reader = MemoryReader()
+        thread_readers.reader = reader
+    return reader
+
+
+def decode_value(data, option, offset=0, size=0):
+    """Decodes the value at data[offset:offset + size] according to the address type option"""
+    value_struct = VALUE_STRUCTS.get(option)
+    if value_struct is not None:
+        return value_struct.unpack_from(data, offset)[0]
+    raw = bytes(data[offset:offset + size])
+    if option == 6:
+        try:
+            return raw.split(b'\x00')[0].decode('utf-8')
+        except UnicodeDecodeError:
+            return "*"
+    if option == 7:
+        try:
+            return raw.decode('utf-16').split('\x00')[0]
+        except UnicodeDecodeError:
+            return "*"
+    return raw
 
 
 # Reads value from memory
+def memory_read_size(address_read, offsets, option):
+    """Number of bytes read_memory_address reads for the given type option"""
+    if option < 6:
+        return max(int(Addresses.application_architecture/8), value_buffer_size(option))
+    return 32
+
+
+@instrumented(memory_read_size)
 def read_memory_address(address_read, offsets, option):
     try:
-        address = c.c_void_p(Addresses.base_address + address_read + offsets)
-        if option < 6:
-            buffer_size = int(Addresses.application_architecture/8)
-        else:
-            buffer_size = 32
-        buffer = c.create_string_buffer(buffer_size)
-        result = memory_api.read_process_memory(Addresses.process_handle, address, buffer, buffer_size)
-        if not result:
+        address = Addresses.base_address + address_read + offsets
+        buffer_size = memory_read_size(address_read, offsets, option)
+        reader = get_memory_reader()
+        if not reader.read(Addresses.process_handle, address, buffer_size):
             return None
-        match option:
-            case 1:
-                return c.cast(buffer, c.POINTER(c.c_byte)).contents.value
-            case 2:
-                return c.cast(buffer, c.POINTER(c.c_short)).contents.value
-            case 3:
-                return c.cast(buffer, c.POINTER(c.c_int)).contents.value
-            case 4:
-                return c.cast(buffer, c.POINTER(c.c_ulonglong)).contents.value
-            case 5:
-                return c.cast(buffer, c.POINTER(c.c_double)).contents.value
-            case 6:
-                try:
-                    decoded_value = buffer.value.decode('utf-8')
-                except UnicodeDecodeError:
-                    decoded_value = "*"
-                return decoded_value
-            case 7:
-                try:
-                    decoded_value = buffer.raw.decode('utf-16').split('\x00')[0]
-                except UnicodeDecodeError:
-                    decoded_value = "*"
-                return decoded_value
-            case _:
-                return bytes(buffer)
+        return decode_value(reader.view, option, 0, buffer_size)
     except Exception as e:
         print('Memory Exception:', e)
         return None
 
 
-def read_pointer_address(address_read, offsets, option):
-    try:
-        address = c.c_void_p(Addresses.base_address + address_read)
-        if option == 6 or option == 7:
-            buffer_size = 64
-        else:
-            buffer_size = int(Addresses.application_architecture/8)
-        buffer = c.create_string_buffer(buffer_size)
-        for offset in offsets:
-            result = memory_api.read_process_memory(Addresses.process_handle, address, buffer, buffer_size)
-            if not result:
+def read_pointer_value(address):
+    """Reads a single pointer of the application architecture size"""
+    pointer_size = int(Addresses.application_architecture/8)
+    reader = get_memory_reader()
+    if not reader.read(Addresses.process_handle, address, pointer_size):
+        return None
+    return POINTER_STRUCTS[pointer_size].unpack_from(reader.view)[0]
+
+
+def resolve_pointer_chain(address_read, offsets):
+    """
+    Follows a pointer chain starting at base_address + address_read.
+    Returns the absolute address of the final value, or None if a hop fails.
+    """
+    address = Addresses.base_address + address_read
+    for offset in offsets:
+        pointer = read_pointer_value(address)
+        if pointer is None:
+            return None
+        address = pointer + offset
+    return address
+
+
+class PointerChainCache:
+    """
+    Remembers the final address of every pointer chain keyed by (base, offsets).
+    The first hop of each base is re-read every Addresses.pointer_cache_interval
+    seconds; if it moved, all chains starting there are resolved again.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.leaves = {}
+        self.first_hops = {}
+
+    def resolve(self, address_read, offsets):
+        base = Addresses.base_address + address_read
+        if not offsets:
+            return base
+        key = (base, tuple(offsets))
+        now = time.monotonic()
+        with self.lock:
+            first_hop = self.first_hops.get(base)
+            if first_hop is not None and now - first_hop[1] >= Addresses.pointer_cache_interval:
+                pointer = read_pointer_value(base)
+                if pointer is not None and pointer == first_hop[0]:
+                    self.first_hops[base] = (pointer, now)
+                else:
+                    self._drop_base(base)
+            leaf = self.leaves.get(key)
+            if leaf is not None:
+                return leaf
+            pointer = read_pointer_value(base)
+            if pointer is None:
                 return None
-            if buffer_size == 4:
-                address = c.c_void_p(c.cast(buffer, c.POINTER(c.c_int)).contents.value + offset)
+            leaf = pointer + offsets[0]
+            for offset in offsets[1:]:
+                next_pointer = read_pointer_value(leaf)
+                if next_pointer is None:
+                    return None
+                leaf = next_pointer + offset
+            self.first_hops[base] = (pointer, now)
+            self.leaves[key] = leaf
+            return leaf
+
+    def invalidate(self, address_read=None, offsets=None):
+        """Forgets one chain, or every chain when called without arguments"""
+        with self.lock:
+            if address_read is None:
+                self.leaves.clear()
+                self.first_hops.clear()
             else:
-                address = c.c_void_p(c.cast(buffer, c.POINTER(c.c_longlong)).contents.value + offset)
-        result = memory_api.read_process_memory(Addresses.process_handle, address, buffer, buffer_size)
-        if not result:
+                self.leaves.pop((Addresses.base_address + address_read, tuple(offsets)), None)
+
+    def _drop_base(self, base):
+        self.first_hops.pop(base, None)
+        for key in [key for key in self.leaves if key[0] == base]:
+            del self.leaves[key]
+
+
+pointer_cache = PointerChainCache()
+
+
+# struct format and size of every address type option inside a struct layout
+STRUCT_FIELD_FORMATS = {1: 'b', 2: 'h', 3: 'i', 4: 'Q', 5: 'd', 6: '32s', 7: '32s'}
+
+
+class StructLayout:
+    """
+    Reads a group of fields that share a base address with one read.
+    The covering byte range is computed once from (name, offset, option) fields
+    and decoded with a single precompiled struct.Struct.
+    """
+
+    def __init__(self, fields):
+        self.names = [name for name, offset, option in fields]
+        self.options = [option for name, offset, option in fields]
+        offsets = [offset for name, offset, option in fields]
+        sizes = [struct.calcsize('<' + STRUCT_FIELD_FORMATS[option]) for option in self.options]
+        self.start = min(offsets)
+        self.size = max(offset + size for offset, size in zip(offsets, sizes)) - self.start
+
+        # Lay the fields out in address order, padding the gaps between them
+        order = sorted(range(len(fields)), key=lambda i: offsets[i])
+        layout_format = '<'
+        position = self.start
+        for i in order:
+            if offsets[i] < position:
+                raise ValueError(f"Field {self.names[i]} overlaps the previous field")
+            layout_format += 'x' * (offsets[i] - position) + STRUCT_FIELD_FORMATS[self.options[i]]
+            position = offsets[i] + sizes[i]
+        self.struct = struct.Struct(layout_format)
+        self.order = order
+        # Readers of layouts bigger than the shared thread reader, one per thread
+        self.readers = threading.local()
+
+    def reader(self):
+        """MemoryReader of the calling thread that fits the whole layout"""
+        reader = get_memory_reader()
+        if self.size <= reader.size:
+            return reader
+        reader = getattr(self.readers, 'reader', None)
+        if reader is None:
+            reader = self.readers.reader = MemoryReader(self.size)
+        return reader
+
+    def read(self, address):
+        """Returns the decoded fields in the order they were given, or None if the read failed"""
+        reader = self.reader()
+        if not reader.read(Addresses.process_handle, address + self.start, self.size):
             return None
-        match option:
-            case 1:
-                return c.cast(buffer, c.POINTER(c.c_byte)).contents.value
-            case 2:
-                return c.cast(buffer, c.POINTER(c.c_short)).contents.value
-            case 3:
-                return c.cast(buffer, c.POINTER(c.c_int)).contents.value
-            case 4:
-                return c.cast(buffer, c.POINTER(c.c_ulonglong)).contents.value
-            case 5:
-                return c.cast(buffer, c.POINTER(c.c_double)).contents.value
-            case 6:
-                try:
-                    decoded_value = buffer.value.decode('utf-8')
-                except UnicodeDecodeError:
-                    decoded_value = "*"
-                return decoded_value
-            case 7:
-                try:
-                    decoded_value = buffer.raw.decode('utf-16').split('\x00')[0]
-                except UnicodeDecodeError:
-                    decoded_value = "*"
-                return decoded_value
-            case _:
-                return bytes(buffer)
-    except Exception as e:
-        print('Pointer Exception:', e)
+        raw_values = self.struct.unpack_from(reader.view)
+        values = [None] * len(self.names)
+        for raw_value, i in zip(raw_values, self.order):
+            values[i] = self.decode_field(raw_value, self.options[i])
+        return tuple(values)
+
+    @staticmethod
+    def decode_field(raw_value, option):
+        if option == 6:
+            try:
+                return raw_value.split(b'\x00')[0].decode('utf-8')
+            except UnicodeDecodeError:
+                return "*"
+        if option == 7:
+            try:
+                return raw_value.decode('utf-16').split('\x00')[0]
+            except UnicodeDecodeError:
+                return "*"
+        return raw_value
+
+
+target_layouts = {}
+
+
+def get_target_layout():
+    """StructLayout for the configured target_* offsets, rebuilt when the settings change"""
+    fields = (
+        ('x', Addresses.target_x_offset, Addresses.target_x_type),
+        ('y', Addresses.target_y_offset, Addresses.target_y_type),
+        ('z', Addresses.target_z_offset, Addresses.target_z_type),
+        ('name', Addresses.target_name_offset, Addresses.target_name_type),
+        ('hp', Addresses.target_hp_offset, Addresses.target_hp_type),
+    )
+    if any(offset is None for name, offset, option in fields):
         return None
+    if fields not in target_layouts:
+        try:
+            target_layouts[fields] = StructLayout(fields)
+        except ValueError as e:
+            # Overlapping offsets, read the fields one by one instead
+            print('Target Layout Exception:', e)
+            target_layouts[fields] = None
+    return target_layouts[fields]
 
 
 def read_targeting_status():
+    snapshot = current_snapshot()
+    target_id = snapshot.target_id if snapshot is not None else None
     if Addresses.attack_address_offset == [-1]:
         # Case where Attack Address holds the ID directly
-        attack_id = read_memory_address(Addresses.attack_address, 0, Addresses.my_attack_type)
-        return attack_id if attack_id and attack_id > 0 else 0
+        return target_id if target_id and target_id > 0 else 0
     else:
         # Standard pointer case
-        attack = read_pointer_address(Addresses.attack_address, Addresses.attack_address_offset, Addresses.my_attack_type)
-        return attack
+        return target_id
 
 
 def read_my_stats():
-    current_hp = read_pointer_address(Addresses.my_stats_address, Addresses.my_hp_offset, Addresses.my_hp_type)
-    current_max_hp = read_pointer_address(Addresses.my_stats_address, Addresses.my_hp_max_offset, Addresses.my_hp_type)
-    current_mp = read_pointer_address(Addresses.my_stats_address, Addresses.my_mp_offset, Addresses.my_mp_type)
-    current_max_mp = read_pointer_address(Addresses.my_stats_address, Addresses.my_mp_max_offset, Addresses.my_mp_type)
-    return current_hp, current_max_hp, current_mp, current_max_mp
+    snapshot = current_snapshot()
+    if snapshot is None:
+        return None, None, None, None
+    return snapshot.hp, snapshot.max_hp, snapshot.mp, snapshot.max_mp
 
 
 def read_my_wpt():
-    x = read_pointer_address(Addresses.my_x_address, Addresses.my_x_address_offset, Addresses.my_x_type)
-    y = read_pointer_address(Addresses.my_y_address, Addresses.my_y_address_offset, Addresses.my_y_type)
-    z = read_pointer_address(Addresses.my_z_address, Addresses.my_z_address_offset, Addresses.my_z_type)
-    return x, y, z
+    snapshot = current_snapshot()
+    if snapshot is None:
+        return None, None, None
+    return snapshot.x, snapshot.y, snapshot.z
 
 
 def read_target_info():
+    state = game_state.latest()
+    if state is not None and state.target is not None:
+        return state.target
+    return read_target_info_direct()
+
+
+def read_target_info_direct():
     if Addresses.attack_address_offset == [-1]:
         # Scan for ID mode
         target_id = read_memory_address(Addresses.attack_address, 0, Addresses.my_attack_type)
         if target_id and target_id > 0:
             exclude_addr = Addresses.base_address + Addresses.attack_address
-            absolute_address = scan_memory_for_value(target_id, exclude_address=exclude_addr)
+            absolute_address = creature_index.lookup(target_id, exclude_address=exclude_addr)
             if absolute_address is not None:
                 # We need an offset that when added to base_address gives absolute_address
                 # read_memory_address uses: base_address + address_read + offsets
@@ -161,6 +316,13 @@ def read_target_info():
         # Standard pointer case
         attack_address = read_memory_address(Addresses.attack_address, 0, Addresses.my_attack_type) - Addresses.base_address
 
+    layout = get_target_layout()
+    if layout is not None:
+        values = layout.read(Addresses.base_address + attack_address)
+        if values is None:
+            return None, None, None, None, None
+        return values
+
     target_x = read_memory_address(attack_address, Addresses.target_x_offset, Addresses.target_x_type)
     target_y = read_memory_address(attack_address, Addresses.target_y_offset, Addresses.target_y_type)
     target_z = read_memory_address(attack_address, Addresses.target_z_offset, Addresses.target_z_type)
@@ -169,58 +331,494 @@ def read_target_info():
     return target_x, target_y, target_z, target_name, target_hp
 
 
+# Immutable view of the player state read in a single pass
+GameSnapshot = namedtuple('GameSnapshot', ['hp', 'max_hp', 'mp', 'max_mp', 'x', 'y', 'z', 'target_id', 'timestamp'])
+
+
+class GameSnapshotReader:
+    """
+    Resolves every configured pointer chain once and then fetches all leaf values
+    with one vectored read per call. Leaf addresses come from the pointer cache and
+    are refreshed from it every Addresses.pointer_cache_interval seconds; chains are
+    fully re-resolved when a read fails or returns implausible stats. The attack chain
+    is walked on every read, its pointer moves as soon as the client retargets.
+    """
+
+    # (snapshot field, address variable, offset variable, type variable)
+    FIELDS = (
+        ('hp', 'my_stats_address', 'my_hp_offset', 'my_hp_type'),
+        ('max_hp', 'my_stats_address', 'my_hp_max_offset', 'my_hp_type'),
+        ('mp', 'my_stats_address', 'my_mp_offset', 'my_mp_type'),
+        ('max_mp', 'my_stats_address', 'my_mp_max_offset', 'my_mp_type'),
+        ('x', 'my_x_address', 'my_x_address_offset', 'my_x_type'),
+        ('y', 'my_y_address', 'my_y_address_offset', 'my_y_type'),
+        ('z', 'my_z_address', 'my_z_address_offset', 'my_z_type'),
+        ('target_id', 'attack_address', 'attack_address_offset', 'my_attack_type'),
+    )
+    # Chains walked again on every read instead of cached: the attack pointer changes with every new target
+    VOLATILE_FIELDS = ('target_id',)
+
+    def __init__(self):
+        self.leaves = None
+        self.reader = MemoryReader()
+        self.batch = None
+        self.buffer_offsets = []
+        # (address, size) of every batched leaf, the batch is kept while they stay the same
+        self.layout = None
+        self.volatile = []
+        self.resolved_at = 0
+
+    def invalidate(self):
+        self.leaves = None
+
+    def resolve(self):
+        """
+        Resolves every pointer chain through the pointer cache, None for unresolved fields.
+        A new read batch is prepared only when a leaf address changed, so an unresolved
+        chain (e.g. no target selected) is retried on the interval without touching the batch.
+        """
+        leaves = []
+        volatile = []
+        for index, (name, address_var, offset_var, type_var) in enumerate(self.FIELDS):
+            address_read = getattr(Addresses, address_var, None)
+            offsets = getattr(Addresses, offset_var, None)
+            option = getattr(Addresses, type_var, 3)
+            if address_read is None or offsets is None:
+                leaves.append(None)
+                continue
+            if offsets == [-1]:
+                # Attack address holds the ID directly
+                address = Addresses.base_address + address_read
+            elif name in self.VOLATILE_FIELDS:
+                volatile.append((index, address_read, offsets, option))
+                leaves.append(None)
+                continue
+            else:
+                address = pointer_cache.resolve(address_read, offsets)
+                if address is None:
+                    leaves.append(None)
+                    continue
+            leaves.append([address, value_buffer_size(option), option, address_read, offsets, 0])
+        present = [leaf for leaf in leaves if leaf is not None]
+        self.volatile = volatile
+        if not present and not volatile:
+            return False
+        layout = [(leaf[0], leaf[1]) for leaf in present]
+        if layout != self.layout:
+            try:
+                self.batch, self.buffer_offsets = self.reader.prepare(layout)
+            except ValueError as e:
+                # Leaf sizes come from addresses.json, a bad type must not stop the poller
+                print("Snapshot Exception:", e)
+                self.layout = None
+                return False
+            self.layout = layout
+        for leaf, buffer_offset in zip(present, self.buffer_offsets):
+            leaf[5] = buffer_offset
+        self.leaves = leaves
+        self.resolved_at = time.monotonic()
+        return True
+
+    def read(self):
+        """Returns a GameSnapshot, or None if the process could not be read"""
+        if time.monotonic() - self.resolved_at >= Addresses.pointer_cache_interval:
+            self.leaves = None
+        for attempt in range(2):
+            if self.leaves is None and not self.resolve():
+                return None
+            if self.reader.read_batch(Addresses.process_handle, self.batch):
+                view = self.reader.view
+                values = [decode_value(view, leaf[2], leaf[5], leaf[1]) if leaf is not None else None
+                          for leaf in self.leaves]
+            else:
+                values = self.read_leaves_separately()
+            for index, address_read, offsets, option in self.volatile:
+                values[index] = self.read_volatile(address_read, offsets, option)
+            snapshot = GameSnapshot(*values, time.monotonic())
+            if self.is_plausible(snapshot):
+                return snapshot
+            # Some pointer along the way moved, resolve the chains again
+            self.leaves = None
+            pointer_cache.invalidate()
+        return None
+
+    def read_leaves_separately(self):
+        """Slow path after a failed batch read, unreadable fields become None"""
+        values = []
+        for leaf in self.leaves:
+            if leaf is not None and self.reader.read(Addresses.process_handle, leaf[0], leaf[1]):
+                values.append(decode_value(self.reader.view, leaf[2], 0, leaf[1]))
+                continue
+            if leaf is not None:
+                pointer_cache.invalidate(leaf[3], leaf[4])
+                self.resolved_at = 0
+            values.append(None)
+        return values
+
+    def read_volatile(self, address_read, offsets, option):
+        """Walks an uncached chain and reads its value, None if a hop fails"""
+        address = resolve_pointer_chain(address_read, offsets)
+        size = value_buffer_size(option)
+        if address is None or not self.reader.read(Addresses.process_handle, address, size):
+            return None
+        return decode_value(self.reader.view, option, 0, size)
+
+    @staticmethod
+    def is_plausible(snapshot):
+        if snapshot.hp is not None and snapshot.max_hp is not None:
+            if snapshot.max_hp <= 0 or not 0 <= snapshot.hp <= snapshot.max_hp:
+                return False
+        if snapshot.mp is not None and snapshot.max_mp is not None:
+            if not 0 <= snapshot.mp <= max(snapshot.max_mp, 0):
+                return False
+        return True
+
+
+game_snapshot_reader = GameSnapshotReader()
+snapshot_lock = threading.Lock()
+
+
+def read_game_snapshot():
+    try:
+        with snapshot_lock:
+            return game_snapshot_reader.read()
+    except Exception as e:
+        print('Snapshot Exception:', e)
+        return None
+
+
+def relevant_memory_ranges():
+    """
+    (address, size) ranges the snapshot and target reads touch right now: every
+    pointer hop, every leaf value and the current target struct.
+    Used by the memory dump recorder.
+    """
+    pointer_size = int(Addresses.application_architecture/8)
+    ranges = []
+    for name, address_var, offset_var, type_var in GameSnapshotReader.FIELDS:
+        address_read = getattr(Addresses, address_var, None)
+        offsets = getattr(Addresses, offset_var, None)
+        option = getattr(Addresses, type_var, 3)
+        if address_read is None or offsets is None:
+            continue
+        address = Addresses.base_address + address_read
+        if offsets != [-1]:
+            for offset in offsets:
+                ranges.append((address, pointer_size))
+                pointer = read_pointer_value(address)
+                if pointer is None:
+                    address = None
+                    break
+                address = pointer + offset
+        if address is not None:
+            ranges.append((address, value_buffer_size(option)))
+
+    layout = get_target_layout()
+    if Addresses.attack_address is None or layout is None:
+        return ranges
+    target_id = read_memory_address(Addresses.attack_address, 0, Addresses.my_attack_type)
+    if not target_id:
+        return ranges
+    if Addresses.attack_address_offset == [-1]:
+        target_address = creature_index.lookup(target_id, exclude_address=Addresses.base_address + Addresses.attack_address)
+        if target_address is None:
+            return ranges
+        # ID field the creature index looks for
+        ranges.append((target_address, 4))
+    else:
+        target_address = target_id
+    ranges.append((target_address + layout.start, layout.size))
+    return ranges
+
+
+# State published by the state poller: snapshot plus (x, y, z, name, hp) of the current target
+PolledState = namedtuple('PolledState', ['version', 'snapshot', 'target'])
+
+# Change events detected between two published states
+EVENT_STATS_CHANGED = 'stats_changed'
+EVENT_POSITION_CHANGED = 'position_changed'
+EVENT_TARGET_ACQUIRED = 'target_acquired'
+EVENT_TARGET_LOST = 'target_lost'
+EVENT_TARGET_HP_CHANGED = 'target_hp_changed'
+EVENT_TARGET_MOVED = 'target_moved'
+StateEvent = namedtuple('StateEvent', ['kind', 'version', 'old', 'new'])
+
+
+def detect_state_events(previous, current, version):
+    """Compares two PolledStates and returns the StateEvents between them"""
+    old, new = previous.snapshot, current.snapshot
+    events = []
+    if (old.hp, old.max_hp, old.mp, old.max_mp) != (new.hp, new.max_hp, new.mp, new.max_mp):
+        events.append(StateEvent(EVENT_STATS_CHANGED, version, (old.hp, old.max_hp, old.mp, old.max_mp),
+                                 (new.hp, new.max_hp, new.mp, new.max_mp)))
+    if (old.x, old.y, old.z) != (new.x, new.y, new.z):
+        events.append(StateEvent(EVENT_POSITION_CHANGED, version, (old.x, old.y, old.z), (new.x, new.y, new.z)))
+    if old.target_id != new.target_id:
+        if old.target_id:
+            events.append(StateEvent(EVENT_TARGET_LOST, version, old.target_id, new.target_id))
+        if new.target_id:
+            events.append(StateEvent(EVENT_TARGET_ACQUIRED, version, old.target_id, new.target_id))
+    elif new.target_id and previous.target and current.target:
+        if previous.target[4] != current.target[4]:
+            events.append(StateEvent(EVENT_TARGET_HP_CHANGED, version, previous.target[4], current.target[4]))
+        if previous.target[:3] != current.target[:3]:
+            events.append(StateEvent(EVENT_TARGET_MOVED, version, previous.target[:3], current.target[:3]))
+    return events
+
+
+class GameStateStore:
+    """
+    Latest PolledState shared by every module. While a poller is publishing,
+    the read_* helpers answer from here instead of touching process memory,
+    and threads can block on StateEvents instead of sleeping.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.state = None
+        self.version = 0
+        self.max_age = 0
+        self.events = deque(maxlen=256)
+
+    def publish(self, snapshot, target, max_age):
+        with self.condition:
+            self.version += 1
+            state = PolledState(self.version, snapshot, target)
+            if self.state is not None:
+                self.events.extend(detect_state_events(self.state, state, self.version))
+            self.state = state
+            self.max_age = max_age
+            self.condition.notify_all()
+
+    def stop_publishing(self):
+        with self.condition:
+            self.state = None
+            self.condition.notify_all()
+
+    def latest(self):
+        """Returns the latest PolledState, or None if nothing fresh was published"""
+        state = self.state
+        if state is None or state.snapshot is None or time.monotonic() - state.snapshot.timestamp > self.max_age:
+            return None
+        return state
+
+    def wait_for_update(self, version, timeout):
+        """Blocks until a state newer than version is published or timeout (seconds) expires"""
+        with self.condition:
+            self.condition.wait_for(lambda: self.state is not None and self.state.version > version, timeout)
+            return self.latest()
+
+    def wait_for_event(self, kinds, version, timeout):
+        """
+        Blocks until an event of one of kinds happens after version, or timeout (seconds) expires.
+        Returns the matching events, empty on timeout. Without a poller it just sleeps for timeout.
+        """
+        with self.condition:
+            if self.state is not None:
+                self.condition.wait_for(lambda: self.state is None or self._events_since(kinds, version), timeout)
+                return self._events_since(kinds, version)
+        time.sleep(timeout)
+        return []
+
+    def _events_since(self, kinds, version):
+        return [event for event in self.events if event.version > version and event.kind in kinds]
+
+
+game_state = GameStateStore()
+
+
+def current_snapshot():
+    state = game_state.latest()
+    if state is not None:
+        return state.snapshot
+    return read_game_snapshot()
+
+
+SCAN_CHUNK_SIZE = 4 * 1024 * 1024
+SCAN_REGION_LIMIT = 1024 * 1024 * 1024
+scan_buffer = bytearray(SCAN_CHUNK_SIZE)
+scan_lock = threading.Lock()
+
+
 def scan_memory_for_value(value, exclude_address=None):
     """
     Scans the process memory for a specific 4-byte integer value.
-    Iterates through all committed memory pages.
+    Walks every readable region in SCAN_CHUNK_SIZE chunks and compares
+    4-byte aligned words with numpy.
     Returns the ABSOLUTE address if found, else None.
     """
     try:
-        current_address = 0
-        mbi = MEMORY_BASIC_INFORMATION()
-        value_bytes = struct.pack("I", value & 0xFFFFFFFF)
-        
+        target = np.uint32(value & 0xFFFFFFFF)
+
         # Determine scan limit based on architecture
         max_address = 0x7FFFFFFF if Addresses.application_architecture == 32 else 0x7FFFFFFFFFFF
-        
-        while current_address < max_address:
-            # Query memory region
-            if not c.windll.kernel32.VirtualQueryEx(Addresses.process_handle, c.c_void_p(current_address), c.byref(mbi), c.sizeof(mbi)):
-                break
-            
-            # Check if region is COMMITTED and not NOACCESS or GUARD
-            if mbi.State == 0x1000 and not (mbi.Protect & (0x100 | 0x01)):
-                region_size = mbi.RegionSize
-                if region_size < 100 * 1024 * 1024: # 100MB limit
-                    buffer = c.create_string_buffer(region_size)
-                    bytes_read = c.c_size_t()
-                    
-                    if c.windll.kernel32.ReadProcessMemory(Addresses.process_handle, mbi.BaseAddress, buffer, region_size, c.byref(bytes_read)):
-                        data = buffer.raw[:bytes_read.value]
-                        
-                        search_start = 0
-                        while True:
-                            found_index = data.find(value_bytes, search_start)
-                            if found_index == -1:
-                                break
-                            
-                            absolute_found = current_address + found_index
-                            if exclude_address is not None and absolute_found == exclude_address:
-                                # Skip this one and keep looking in the same region
-                                search_start = found_index + 1
-                                continue
-                                
-                            return absolute_found
-            
-            # Move to the start of the next region
-            current_address += mbi.RegionSize
-            
+        regions = memory_api.enumerate_regions(Addresses.process_handle, max_address)
+
+        with scan_lock:
+            view = memoryview(scan_buffer)
+            for region_start, region_size in regions:
+                if region_size > SCAN_REGION_LIMIT:
+                    continue
+                for chunk_start in range(region_start, region_start + region_size, SCAN_CHUNK_SIZE):
+                    chunk_size = min(SCAN_CHUNK_SIZE, region_start + region_size - chunk_start)
+                    bytes_read = memory_api.read_into(Addresses.process_handle, chunk_start, view[:chunk_size])
+                    if bytes_read < 4:
+                        break
+                    words = np.frombuffer(scan_buffer, dtype=np.uint32, count=bytes_read // 4)
+                    for index in np.flatnonzero(words == target):
+                        absolute_found = chunk_start + int(index) * 4
+                        if exclude_address is not None and absolute_found == exclude_address:
+                            # Skip this one and keep looking
+                            continue
+                        return absolute_found
+                    if bytes_read < chunk_size:
+                        break
         return None
-        
+
     except Exception as e:
         print(f"Error scanning memory: {e}")
 
 
+# numpy types of the integer address type options, to check creature fields in bulk
+SCAN_FIELD_TYPES = {1: np.int8, 2: np.int16, 3: np.int32, 4: np.uint64}
+# Creature IDs start at 0x10000000 (players), monsters and NPCs come above
+CREATURE_ID_MIN = 0x10000000
+
+
+def creature_checks():
+    """
+    (offset from the ID, numpy type, min, max) of the configured target fields a creature
+    struct must hold plausible values in: coordinates, floor and health percent
+    """
+    checks = []
+    for offset, option, low, high in ((Addresses.target_x_offset, Addresses.target_x_type, 1, 65535),
+                                      (Addresses.target_y_offset, Addresses.target_y_type, 1, 65535),
+                                      (Addresses.target_z_offset, Addresses.target_z_type, 0, 15),
+                                      (Addresses.target_hp_offset, Addresses.target_hp_type, 0, 100)):
+        if isinstance(offset, int) and option in SCAN_FIELD_TYPES:
+            checks.append((offset, SCAN_FIELD_TYPES[option], low, high))
+    return checks
+
+
+def scan_creatures(checks, exclude_address=None, regions=None, wanted_id=None):
+    """
+    Reads the regions (every readable region when None) once and returns {creature ID: absolute address}
+    of every 4-byte aligned word in the creature ID range whose fields pass checks. First address wins.
+    In the same pass the first bare match of wanted_id is kept, it is returned for wanted_id when
+    no struct of it passed the checks or there are no checks.
+    """
+    found = {}
+    bare_address = None
+    if regions is None:
+        max_address = 0x7FFFFFFF if Addresses.application_architecture == 32 else 0x7FFFFFFFFFFF
+        regions = memory_api.enumerate_regions(Addresses.process_handle, max_address)
+    with scan_lock:
+        view = memoryview(scan_buffer)
+        data = np.frombuffer(scan_buffer, dtype=np.uint8)
+        for region_start, region_size in regions:
+            if region_size > SCAN_REGION_LIMIT:
+                continue
+            for chunk_start in range(region_start, region_start + region_size, SCAN_CHUNK_SIZE):
+                chunk_size = min(SCAN_CHUNK_SIZE, region_start + region_size - chunk_start)
+                bytes_read = memory_api.read_into(Addresses.process_handle, chunk_start, view[:chunk_size])
+                if bytes_read < 4:
+                    break
+                words = np.frombuffer(scan_buffer, dtype=np.uint32, count=bytes_read // 4)
+                if wanted_id is not None and bare_address is None:
+                    for index in np.flatnonzero(words == wanted_id):
+                        address = chunk_start + int(index) * 4
+                        if address != exclude_address:
+                            bare_address = address
+                            break
+                if not checks:
+                    if bytes_read < chunk_size:
+                        break
+                    continue
+                positions = np.flatnonzero(words >= CREATURE_ID_MIN) * 4
+                for offset, field_type, low, high in checks:
+                    size = np.dtype(field_type).itemsize
+                    fields = positions + offset
+                    positions = positions[(fields >= 0) & (fields + size <= bytes_read)]
+                    fields = positions + offset
+                    # Little-endian gather of the field bytes, unaligned fields included
+                    raw = np.zeros(len(positions), dtype=np.uint64)
+                    for byte in range(size):
+                        raw |= data[fields + byte].astype(np.uint64) << np.uint64(8 * byte)
+                    values = raw.view(np.int64) if size == 8 else raw.astype(np.int64)
+                    if size < 8 and np.issubdtype(field_type, np.signedinteger):
+                        values = np.where(values >= 1 << (8 * size - 1), values - (1 << (8 * size)), values)
+                    positions = positions[(values >= low) & (values <= high)]
+                for position in positions:
+                    address = chunk_start + int(position)
+                    if address != exclude_address:
+                        found.setdefault(int(words[position // 4]), address)
+                if bytes_read < chunk_size:
+                    break
+    if bare_address is not None:
+        found.setdefault(wanted_id, bare_address)
+    return found
+
+
+class CreatureIndex:
+    """
+    Maps creature IDs to the address of their struct for ID targeting mode.
+    A miss runs one population pass that indexes every creature whose target fields
+    look valid, over the whole process the first time and then only over the region
+    the target was found in, so creatures already on screen are found without scanning
+    again. A cached address is confirmed by re-reading its ID field. The same pass
+    looks for the bare ID, used without target offsets or when no struct matches.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.addresses = {}
+        self.regions = []
+
+    def lookup(self, creature_id, exclude_address=None):
+        creature_id &= 0xFFFFFFFF
+        with self.lock:
+            address = self.addresses.get(creature_id)
+            regions = list(self.regions)
+        if address is not None and self.read_id(address) == creature_id:
+            return address
+
+        # Scans run without the lock, lookups of indexed creatures don't wait for them
+        checks = creature_checks()
+        index = scan_creatures(checks, exclude_address, regions or None, creature_id)
+        if regions and creature_id not in index:
+            # Not in the known regions, index the whole process
+            regions = []
+            index = scan_creatures(checks, exclude_address, None, creature_id)
+        with self.lock:
+            self.addresses = index
+        address = index.get(creature_id)
+        if address is not None and not regions:
+            self.remember_region(address)
+        return address
+
+    def read_id(self, address):
+        reader = get_memory_reader()
+        if not reader.read(Addresses.process_handle, address, 4):
+            return None
+        return POINTER_STRUCTS[4].unpack_from(reader.view)[0]
+
+    def remember_region(self, address):
+        for region_start, region_size in memory_api.enumerate_regions(Addresses.process_handle):
+            if region_start <= address < region_start + region_size:
+                with self.lock:
+                    if (region_start, region_size) not in self.regions:
+                        self.regions.append((region_start, region_size))
+                return
+
+    def clear(self):
+        with self.lock:
+            self.addresses.clear()
+            self.regions.clear()
+
+
+creature_index = CreatureIndex()
+
+
 def enable_debug_privilege_pywin32():
     try:
         return memory_api.enable_debug_privilege()
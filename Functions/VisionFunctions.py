@@ -0,0 +1,550 @@
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import cv2 as cv
+import numpy as np
+
+import Addresses
+
+
+def load_item_templates(image_path, height=22, blur=True):
+    """Blurred grayscale frames of an item image (all frames of a GIF), at capture resolution"""
+    frames = []
+    if image_path.lower().endswith('.gif'):
+        from PIL import Image, ImageSequence
+        gif = Image.open(image_path)
+        for frame in ImageSequence.Iterator(gif):
+            frame = np.array(frame.convert('RGB'))
+            # PIL frames are RGB, unlike the BGR of cv.imread
+            frames.append(cv.cvtColor(frame, cv.COLOR_RGB2GRAY))
+    elif os.path.exists(image_path):
+        template = cv.imread(image_path, cv.IMREAD_GRAYSCALE)
+        if template is not None:
+            frames.append(template)
+    frames = [frame[:height, :] for frame in frames]
+    return [cv.GaussianBlur(frame, (7, 7), 0) for frame in frames] if blur else frames
+
+
+def correlation_peaks(result, threshold, radius=2):
+    """(x, y, score) of the local maxima of a matchTemplate map that score at least threshold"""
+    size = 2 * radius + 1
+    mask = (result >= threshold) & (result == cv.dilate(result, np.ones((size, size), np.uint8)))
+    ys, xs = np.nonzero(mask)
+    return zip(xs.tolist(), ys.tolist(), result[ys, xs].tolist())
+
+
+def suppress_peaks(peaks, distance):
+    """
+    Non-maximum suppression of (x, y, score) peaks: keeps the best peak and drops every
+    other one closer than distance to a kept peak. Kept peaks are hashed into a grid of
+    distance sized cells, so each peak is only compared with its 9 neighbouring cells.
+    """
+    kept = []
+    cells = {}
+    limit = distance * distance
+    for x, y, score in sorted(peaks, key=lambda peak: peak[2], reverse=True):
+        cell_x = int(x // distance)
+        cell_y = int(y // distance)
+        if any((x - kx) ** 2 + (y - ky) ** 2 < limit
+               for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+               for kx, ky in cells.get((cell_x + dx, cell_y + dy), ())):
+            continue
+        cells.setdefault((cell_x, cell_y), []).append((x, y))
+        kept.append((x, y, score))
+    return kept
+
+
+class MatchTemplate:
+    """A blurred grayscale template and its upscaled copy"""
+    __slots__ = ('native', 'upscaled')
+
+    def __init__(self, native, resize_factor, upscaled=None):
+        self.native = native
+        if upscaled is None:
+            upscaled = cv.resize(native, None, fx=resize_factor, fy=resize_factor, interpolation=cv.INTER_CUBIC)
+        self.upscaled = upscaled
+
+
+class TemplateStore:
+    """
+    Preprocessed item templates shared by every LootThread of the process.
+    The first load of an image writes its blurred and upscaled frames to directory
+    as two .npy files (.npz archives cannot be memory-mapped), later loads map them
+    instead of decoding and blurring again. Files are keyed by the source path,
+    its mtime and size and the pipeline parameters, so an edited image is prepared again.
+    """
+    # Bump when load_item_templates or MatchTemplate change their output
+    PIPELINE_VERSION = 1
+
+    def __init__(self, directory="Save/Templates"):
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.templates = {}
+
+    def key(self, image_path, resize_factor):
+        stat = os.stat(image_path)
+        return os.path.abspath(image_path), stat.st_mtime_ns, stat.st_size, resize_factor, self.PIPELINE_VERSION
+
+    def get(self, image_path, resize_factor=3):
+        """MatchTemplates of every frame of image_path"""
+        key = self.key(image_path, resize_factor)
+        with self.lock:
+            templates = self.templates.get(key)
+            if templates is None:
+                templates = self.load(key) or self.prepare(image_path, key)
+                self.templates[key] = templates
+            return templates
+
+    def cache_files(self, key):
+        name = hashlib.sha1(repr(key).encode()).hexdigest()
+        return (os.path.join(self.directory, f"{name}.native.npy"),
+                os.path.join(self.directory, f"{name}.upscaled.npy"))
+
+    def load(self, key):
+        native_path, upscaled_path = self.cache_files(key)
+        try:
+            native = np.load(native_path, mmap_mode='r')
+            upscaled = np.load(upscaled_path, mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+        return [MatchTemplate(native[i], key[3], upscaled[i]) for i in range(len(native))]
+
+    def prepare(self, image_path, key):
+        templates = [MatchTemplate(frame, key[3]) for frame in load_item_templates(image_path)]
+        if not templates:
+            return templates
+        # GIF frames share one size, anything else is only kept in memory
+        if len({template.native.shape for template in templates}) == 1:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                for path, arrays in zip(self.cache_files(key), ([t.native for t in templates], [t.upscaled for t in templates])):
+                    temporary = f"{path}.{os.getpid()}.tmp"
+                    with open(temporary, 'wb') as f:
+                        np.save(f, np.stack(arrays))
+                    os.replace(temporary, path)
+            except OSError as e:
+                print("TemplateStore Exception:", e)
+        return templates
+
+
+class FFTCorrelator:
+    """
+    TM_CCOEFF_NORMED of a group of same sized templates from one transform of the image:
+    one forward DFT of the image, then a product with each precomputed template spectrum
+    and an inverse DFT. The image terms of the normalization come from integral images,
+    so they are computed once for the whole group.
+    """
+    # Spectra kept per DFT size, region sizes change with the dirty tiles
+    MAX_SPECTRA = 8
+
+    def __init__(self, templates):
+        centered = np.stack([np.asarray(template, dtype=np.float32) for template in templates])
+        self.height, self.width = centered.shape[1:]
+        # Zero mean templates, so the image mean drops out of the correlation
+        centered -= centered.mean(axis=(1, 2), keepdims=True)
+        self.centered = centered
+        self.inverse_norms = 1 / np.maximum(np.sqrt((centered * centered).sum(axis=(1, 2))), 1e-6)
+        self.spectra = {}
+        self.lock = threading.Lock()
+
+    def spectrum(self, shape):
+        """Packed (CCS) DFTs of the templates zero padded to shape"""
+        with self.lock:
+            spectra = self.spectra.get(shape)
+            if spectra is None:
+                if len(self.spectra) >= self.MAX_SPECTRA:
+                    self.spectra.clear()
+                spectra = []
+                padded = np.zeros(shape, dtype=np.float32)
+                for template in self.centered:
+                    padded[:self.height, :self.width] = template
+                    spectra.append(cv.dft(padded))
+                self.spectra[shape] = spectra
+            return spectra
+
+    def correlate(self, image):
+        """Float32 score maps of size (H - h + 1, W - w + 1), like cv.matchTemplate of each template"""
+        h, w = self.height, self.width
+        rows = image.shape[0] - h + 1
+        cols = image.shape[1] - w + 1
+        # Zero padding only changes the wrapped part of the circular correlation, which is cut off
+        shape = (cv.getOptimalDFTSize(image.shape[0]), cv.getOptimalDFTSize(image.shape[1]))
+        padded = np.zeros(shape, dtype=np.float32)
+        padded[:image.shape[0], :image.shape[1]] = image
+        image_spectrum = cv.dft(padded)
+
+        sums, squares = cv.integral2(np.ascontiguousarray(image), sdepth=cv.CV_64F)
+        local_sum = sums[h:, w:] - sums[:-h, w:] - sums[h:, :-w] + sums[:-h, :-w]
+        local_squares = squares[h:, w:] - squares[:-h, w:] - squares[h:, :-w] + squares[:-h, :-w]
+        variance = local_squares - local_sum * local_sum / (h * w)
+        # Flat windows correlate with nothing
+        inverse_deviation = np.zeros(variance.shape, dtype=np.float32)
+        textured = variance >= 1e-2 * h * w
+        inverse_deviation[textured] = 1 / np.sqrt(variance[textured])
+
+        maps = []
+        for template_spectrum, inverse_norm in zip(self.spectrum(shape), self.inverse_norms):
+            product = cv.mulSpectrums(image_spectrum, template_spectrum, 0, conjB=True)
+            correlation = cv.idft(product, flags=cv.DFT_REAL_OUTPUT | cv.DFT_SCALE)[:rows, :cols]
+            scores = correlation * inverse_deviation
+            scores *= inverse_norm
+            maps.append(np.clip(scores, -1, 1, out=scores))
+        return maps
+
+
+class TemplateMatcher:
+    """
+    Finds templates in the blurred grayscale regions of a frame.
+    mode 'native' correlates at capture resolution and only upscales a small window
+    around the peaks whose score is close to the threshold. mode 'upscaled' is the
+    original pipeline, both sides upscaled by resize_factor before matchTemplate.
+    Both return the same hit list: (x, y) top-left corners in capture pixels, one per
+    item, found as correlation peaks and thinned out with suppress_peaks.
+
+    In native mode same sized templates can be correlated together by an FFTCorrelator.
+    fft='auto' times both ways the first time a group size meets a region size and
+    keeps the faster one, 'always' and 'never' force the choice.
+    """
+    # Native peaks this far below the threshold are refined, they may pass upscaled
+    CANDIDATE_SLACK = 0.1
+    # Native peaks this far above the threshold are accepted without refining
+    ACCEPT_MARGIN = 0.05
+    # Native pixels around a peak that are upscaled to refine it
+    REFINE_PADDING = 4
+    # Smaller groups of same sized templates always use matchTemplate
+    FFT_MIN_GROUP = 4
+    # Shared by the matchers of every LootThread, a one-shot thread per corpse must not time again
+    # (template shape, group size, region size class) -> True when FFT was faster
+    fft_choices = {}
+    # Template ids of a group -> (templates, FFTCorrelator)
+    correlators = {}
+    correlators_lock = threading.Lock()
+
+    def __init__(self, resize_factor=3, mode='native', merge_distance=30, fft='auto'):
+        self.resize_factor = resize_factor
+        self.mode = mode
+        self.fft = fft
+        # Peaks closer than merge_distance upscaled pixels are the same item
+        self.merge_distance = merge_distance
+        self.images = []
+        self.upscaled = {}
+
+    def prepare(self, template):
+        return MatchTemplate(template, self.resize_factor)
+
+    def set_images(self, images):
+        """images: (x, y, blurred gray image) regions of the current pass, x and y in capture pixels"""
+        self.images = images
+        self.upscaled.clear()
+
+    def upscaled_image(self, index):
+        image = self.upscaled.get(index)
+        if image is None:
+            image = cv.resize(self.images[index][2], None, fx=self.resize_factor, fy=self.resize_factor,
+                              interpolation=cv.INTER_CUBIC)
+            self.upscaled[index] = image
+        return image
+
+    def match(self, template, threshold):
+        return self.match_all([template], threshold)[0]
+
+    def match_all(self, templates, threshold, executor=None):
+        """Hit list of every template, the (templates, region) jobs run on executor when given"""
+        if self.mode == 'upscaled':
+            # Filled before the jobs start, the workers only read it
+            for index in range(len(self.images)):
+                self.upscaled_image(index)
+            groups = [(number,) for number in range(len(templates))]
+        else:
+            groups = self.group_templates(templates)
+        jobs = [(group, index) for group in groups for index in range(len(self.images))]
+        costs = [self.images[index][2].size * len(group) for group, index in jobs]
+        run = lambda group, index: self.match_group(templates, group, index, threshold)
+        results = executor.map(run, jobs, costs) if executor else [run(*job) for job in jobs]
+        hits = [[] for _ in templates]
+        for (group, index), group_hits in zip(jobs, results):
+            for number, region_hits in zip(group, group_hits):
+                hits[number].extend(region_hits)
+        return [self.merge(template_hits, self.resize_factor) for template_hits in hits]
+
+    def group_templates(self, templates):
+        """Template numbers grouped by size, groups too small for FFT are split into single templates"""
+        by_shape = {}
+        for number, template in enumerate(templates):
+            by_shape.setdefault(template.native.shape, []).append(number)
+        groups = []
+        for numbers in by_shape.values():
+            if self.fft != 'never' and len(numbers) >= self.FFT_MIN_GROUP:
+                groups.append(tuple(numbers))
+            else:
+                groups.extend((number,) for number in numbers)
+        return groups
+
+    def match_group(self, templates, group, index, threshold):
+        """Peaks of each template of group in region index, see match_region"""
+        if len(group) == 1:
+            return [self.match_region(templates[group[0]], index, threshold)]
+        image = self.images[index][2]
+        th, tw = templates[group[0]].native.shape
+        if image.shape[0] < th or image.shape[1] < tw:
+            return [[] for _ in group]
+        correlator = self.correlator([templates[number] for number in group])
+        choice = (th, tw, len(group), image.size.bit_length())
+        use_fft = self.fft_choices.get(choice) if self.fft == 'auto' else True
+        if use_fft is None:
+            started = time.perf_counter()
+            spatial = [self.match_region(templates[number], index, threshold) for number in group]
+            spatial_time = time.perf_counter() - started
+            started = time.perf_counter()
+            correlator.correlate(image)
+            self.fft_choices[choice] = time.perf_counter() - started < spatial_time
+            return spatial
+        if not use_fft:
+            return [self.match_region(templates[number], index, threshold) for number in group]
+        results = correlator.correlate(image)
+        return [self.match_native(templates[number], index, threshold, result)
+                for number, result in zip(group, results)]
+
+    def correlator(self, group):
+        key = tuple(id(template) for template in group)
+        with self.correlators_lock:
+            entry = self.correlators.get(key)
+            # Ids can be reused once templates are freed, the stored list keeps them alive and checks it
+            if entry is None or any(a is not b for a, b in zip(entry[0], group)):
+                entry = (group, FFTCorrelator([template.native for template in group]))
+                self.correlators[key] = entry
+            return entry[1]
+
+    def match_region(self, template, index, threshold):
+        """(x, y, score) peaks of template in region index, x and y in upscaled capture pixels"""
+        if self.mode == 'upscaled':
+            return self.match_upscaled(template, index, threshold)
+        return self.match_native(template, index, threshold)
+
+    def match_upscaled(self, template, index, threshold):
+        factor = self.resize_factor
+        x, y, image = self.images[index]
+        th, tw = template.native.shape
+        if image.shape[0] < th or image.shape[1] < tw:
+            return []
+        result = cv.matchTemplate(self.upscaled_image(index), template.upscaled, cv.TM_CCOEFF_NORMED)
+        return [(px + x * factor, py + y * factor, score)
+                for px, py, score in correlation_peaks(result, threshold, factor)]
+
+    def match_native(self, template, index, threshold, result=None):
+        """result is the native score map when it was already computed"""
+        factor = self.resize_factor
+        padding = self.REFINE_PADDING
+        x, y, image = self.images[index]
+        th, tw = template.native.shape
+        if image.shape[0] < th or image.shape[1] < tw:
+            return []
+        hits = []
+        if result is None:
+            result = cv.matchTemplate(image, template.native, cv.TM_CCOEFF_NORMED)
+        for px, py, score in correlation_peaks(result, threshold - self.CANDIDATE_SLACK):
+            if score >= threshold + self.ACCEPT_MARGIN:
+                hits.append(((x + px) * factor, (y + py) * factor, score))
+                continue
+            left = max(0, px - padding)
+            top = max(0, py - padding)
+            window = image[top:min(image.shape[0], py + th + padding), left:min(image.shape[1], px + tw + padding)]
+            window = cv.resize(window, None, fx=factor, fy=factor, interpolation=cv.INTER_CUBIC)
+            refined = cv.matchTemplate(window, template.upscaled, cv.TM_CCOEFF_NORMED)
+            for rx, ry, score in correlation_peaks(refined, threshold, factor):
+                hits.append((rx + (x + left) * factor, ry + (y + top) * factor, score))
+        return hits
+
+    def merge(self, hits, factor):
+        hits = sorted(suppress_peaks(hits, self.merge_distance), key=lambda peak: (peak[1], peak[0]))
+        return [(hx / factor, hy / factor) for hx, hy, score in hits]
+
+
+def perceptual_hash(image):
+    """64 bit DCT hash of a gray image: signs of its 8x8 lowest frequencies against their median"""
+    small = cv.resize(image, (32, 32), interpolation=cv.INTER_AREA).astype(np.float32)
+    low = cv.dct(small)[:8, :8].flatten()[1:]
+    bits = low > np.median(low)
+    # 63 bits, packbits pads them to 64
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big') >> 1
+
+
+class PerceptualHashIndex:
+    """
+    Nearest hash lookup tolerant to max_distance differing bits. Hashes are split into
+    8 byte chunks and indexed per chunk; two hashes within 7 bits share at least one
+    chunk, so a lookup only compares the hashes found in its own 8 chunk buckets.
+    """
+    CHUNKS = 8
+
+    def __init__(self, max_distance=6):
+        self.max_distance = min(max_distance, self.CHUNKS - 1)
+        self.buckets = [{} for _ in range(self.CHUNKS)]
+
+    def add(self, hash_value, key):
+        for chunk, bucket in enumerate(self.buckets):
+            bucket.setdefault((hash_value >> (8 * chunk)) & 0xFF, []).append((hash_value, key))
+
+    def lookup(self, hash_value):
+        """Keys of the indexed hashes within max_distance bits, closest first"""
+        found = {}
+        for chunk, bucket in enumerate(self.buckets):
+            for candidate, key in bucket.get((hash_value >> (8 * chunk)) & 0xFF, ()):
+                distance = bin(candidate ^ hash_value).count('1')
+                if distance <= self.max_distance and distance < found.get(key, 65):
+                    found[key] = distance
+        return sorted(found, key=found.get)
+
+
+def edge_period(profile, min_period, max_period):
+    """Strongest period of an edge profile within [min_period, max_period], None if it is not periodic"""
+    profile = profile - profile.mean()
+    if len(profile) < 2 * max_period or not profile.any():
+        return None
+    correlation = np.correlate(profile, profile, 'full')[len(profile) - 1:]
+    lags = correlation[min_period:max_period + 1] / correlation[0]
+    best = int(np.argmax(lags))
+    return min_period + best if lags[best] > 0.3 else None
+
+
+class SlotClassifier:
+    """
+    Classifies the items of container windows slot by slot instead of sliding every
+    template over the loot area. The slot grid is learnt from the hits of a normal
+    TemplateMatcher pass: the period of the frame edges gives the slot pitch, the hits
+    give its phase. Then every slot is cropped at the template size, perceptually
+    hashed and looked up in the PerceptualHashIndex of the templates; the few hash
+    hits are confirmed with one small matchTemplate each.
+    """
+    MIN_PITCH = 24
+    MAX_PITCH = 64
+    # Only the interior is hashed, the outer pixels depend on what the 7x7 blur saw around them
+    BLUR_BORDER = 3
+    # Capture pixels a slot is searched around its grid position when confirming it
+    SLOT_TOLERANCE = 2
+
+    def __init__(self, max_distance=6):
+        self.index = PerceptualHashIndex(max_distance)
+        self.templates = {}
+        self.shape = None
+        self.grid = None
+
+    def add_templates(self, key, templates):
+        """Indexes MatchTemplates of one item, all items must share one template size"""
+        for template in templates:
+            if self.shape is None:
+                self.shape = template.native.shape
+            if template.native.shape != self.shape:
+                continue
+            self.index.add(self.slot_hash(template.native), key)
+            self.templates.setdefault(key, []).append(template)
+
+    def slot_hash(self, image):
+        border = self.BLUR_BORDER
+        return perceptual_hash(image[border:-border, border:-border])
+
+    def learn_grid(self, gray, hits):
+        """Finds the slot grid from a gray frame and the hits of a full pass, returns True once known"""
+        if not hits or self.shape is None:
+            return False
+        edges = np.abs(np.diff(gray.astype(np.int16), axis=1)).sum(axis=0) + 0.0
+        pitch = edge_period(edges, self.MIN_PITCH, self.MAX_PITCH)
+        if pitch is None:
+            edges = np.abs(np.diff(gray.astype(np.int16), axis=0)).sum(axis=1) + 0.0
+            pitch = edge_period(edges, self.MIN_PITCH, self.MAX_PITCH)
+        if pitch is None:
+            return False
+        # The phase most hits agree with, a few hits may be false or off the grid
+        phases = [(round(x) % pitch, round(y) % pitch) for x, y in hits]
+        phase_x, phase_y = max(set(phases), key=phases.count)
+        on_grid = sum(1 for x, y in hits
+                      if min((x - phase_x) % pitch, -(x - phase_x) % pitch) <= 1.5
+                      and min((y - phase_y) % pitch, -(y - phase_y) % pitch) <= 1.5)
+        if on_grid < 0.75 * len(hits):
+            # The period came from something else than container slots
+            return False
+        self.grid = (phase_x, phase_y, pitch)
+        return True
+
+    def slots(self, width, height, regions=None):
+        """Top-left corners of the grid slots that fit in the frame and touch one of regions"""
+        phase_x, phase_y, pitch = self.grid
+        th, tw = self.shape
+        slots = []
+        for y in range(phase_y, height - th + 1, pitch):
+            for x in range(phase_x, width - tw + 1, pitch):
+                if regions is None or any(rx < x + tw and x < rx + rw and ry < y + th and y < ry + rh
+                                          for rx, ry, rw, rh in regions):
+                    slots.append((x, y))
+        return slots
+
+    def classify(self, gray, threshold, regions=None):
+        """key -> [(x, y)] of the items found in the slots touching regions, top to bottom"""
+        th, tw = self.shape
+        height, width = gray.shape
+        margin = 3 + self.SLOT_TOLERANCE
+        found = {}
+        for x, y in self.slots(width, height, regions):
+            # Blurred in context like the templates were matched before
+            left, top = max(0, x - margin), max(0, y - margin)
+            window = cv.GaussianBlur(gray[top:min(height, y + th + margin), left:min(width, x + tw + margin)], (7, 7), 0)
+            slot = window[y - top:y - top + th, x - left:x - left + tw]
+            search = window[max(0, y - top - self.SLOT_TOLERANCE):y - top + th + self.SLOT_TOLERANCE,
+                            max(0, x - left - self.SLOT_TOLERANCE):x - left + tw + self.SLOT_TOLERANCE]
+            for key in self.index.lookup(self.slot_hash(slot)):
+                score = max(cv.minMaxLoc(cv.matchTemplate(search, template.native, cv.TM_CCOEFF_NORMED))[1]
+                            for template in self.templates[key])
+                if score >= threshold:
+                    found.setdefault(key, []).append((float(x), float(y)))
+                    break
+        return found
+
+
+def available_cores():
+    """Cores this process may run on, honouring CPU affinity and cgroup pinning"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+class MatchExecutor:
+    """
+    Bounded thread pool for the (template, region) jobs of one frame.
+    matchTemplate releases the GIL, so the jobs really run on several cores.
+    The most expensive jobs are submitted first so no worker is left with a big
+    job at the end of the frame; results come back in job order.
+    """
+
+    def __init__(self, workers=0):
+        # One core stays free for the rest of the bot
+        self.workers = workers if workers > 0 else max(1, available_cores() - 1)
+        self.pool = ThreadPoolExecutor(self.workers, thread_name_prefix='match') if self.workers > 1 else None
+
+    def map(self, function, jobs, costs=None):
+        if self.pool is None or len(jobs) < 2:
+            return [function(*job) for job in jobs]
+        order = range(len(jobs)) if costs is None else sorted(range(len(jobs)), key=costs.__getitem__, reverse=True)
+        futures = {index: self.pool.submit(function, *jobs[index]) for index in order}
+        return [futures[index].result() for index in range(len(jobs))]
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False)
+
+
+_match_executor = None
+_match_executor_lock = threading.Lock()
+
+
+def match_executor():
+    """MatchExecutor shared by every LootThread, sized by Addresses.match_workers"""
+    global _match_executor
+    with _match_executor_lock:
+        if _match_executor is None:
+            _match_executor = MatchExecutor(Addresses.match_workers)
+        return _match_executor
+
+
+template_store = TemplateStore()
@@ -0,0 +1,40 @@
+import time
+from PyQt5.QtCore import QThread
+
+import Addresses
+from Functions.GeneralFunctions import WindowCapture, frame_store
+
+
+class FrameServiceThread(QThread):
+    """
+    Captures the bounding box of every capture_session region Addresses.frame_service_fps
+    times per second and publishes it to frame_store, so the looting threads and the
+    battle list OCR share one X round trip per frame instead of capturing on their own.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.running = True
+
+    def run(self):
+        capture = None
+        while self.running:
+            interval = 1 / Addresses.frame_service_fps
+            started = time.monotonic()
+            try:
+                bounds = frame_store.bounds()
+                if bounds is not None:
+                    x, y, w, h = bounds
+                    if capture is None or (capture.x, capture.y, capture.w, capture.h) != bounds:
+                        capture = WindowCapture(w, h, x, y)
+                    # Captured straight into the ring, consumers capture on their own again if we miss three frames
+                    slot = capture.capture(frame_store.next_slot((h, w, 4)))
+                    frame_store.publish(slot, x, y, started, interval * 3)
+            except Exception as e:
+                print("FrameServiceThread error:", e)
+            elapsed = time.monotonic() - started
+            QThread.msleep(max(1, int((interval - elapsed) * 1000)))
+        frame_store.stop_publishing()
+
+    def stop(self):
+        self.running = False
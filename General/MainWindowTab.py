@@ -8,7 +8,12 @@ from Settings.SettingsTab import SettingsTab
 from SmartHotkeys.SmartHotkeysTab import SmartHotkeysTab
 from Hotkeys.HotkeysTab import HotkeysTab
 from Looting.LootingTab import LootingTab
+from General.StatePollerThread import StatePollerThread
+from General.FrameServiceThread import FrameServiceThread
+from Functions.InstrumentationFunctions import memory_stats
+import Addresses
 import os
+import time
 
 class MainWindowTab(QWidget):
     def __init__(self):
@@ -21,6 +26,18 @@ class MainWindowTab(QWidget):
         self.smartHotkeysTab_instance = None
         self.hotkeysTab_instance = None
         self.lootingTab_instance = None
+
+        # Shared game state reader used by every module
+        self.state_poller_thread = None
+        if Addresses.state_poll_interval > 0:
+            self.state_poller_thread = StatePollerThread()
+            self.state_poller_thread.start()
+
+        # Shared screen captures used by the vision modules
+        self.frame_service_thread = None
+        if Addresses.frame_service_fps > 0:
+            self.frame_service_thread = FrameServiceThread()
+            self.frame_service_thread.start()
         
         # Bot timer
         self.bot_start_time = QTime.currentTime()
@@ -64,6 +81,17 @@ class MainWindowTab(QWidget):
         self.layout.addWidget(self.hotkeys_button, 3, 0)
         self.layout.addWidget(self.looting_button, 3, 1)
 
+        # --- Memory read stats ---
+        self.memory_stats_checkbox = QCheckBox("Memory Stats", self)
+        self.memory_stats_checkbox.setChecked(memory_stats.enabled)
+        self.memory_stats_checkbox.stateChanged.connect(self.toggle_memory_stats)
+
+        self.dump_stats_button = QPushButton("Dump Stats", self)
+        self.dump_stats_button.clicked.connect(self.dump_memory_stats)
+
+        self.layout.addWidget(self.memory_stats_checkbox, 4, 0)
+        self.layout.addWidget(self.dump_stats_button, 4, 1)
+
         # --- Bot Status GroupBox ---
         self.status_groupbox = QGroupBox("Bot Status", self)
         self.status_layout = QGridLayout()
@@ -459,6 +487,24 @@ class MainWindowTab(QWidget):
         for profile in sorted(profiles):
             self.profile_listWidget.addItem(profile)
 
+    def toggle_memory_stats(self, state):
+        if state == Qt.Checked:
+            memory_stats.reset()
+            memory_stats.enable()
+        else:
+            memory_stats.disable()
+
+    def dump_memory_stats(self):
+        path = f"Save/Stats/memory_stats_{time.strftime('%Y%m%d_%H%M%S')}.json"
+        try:
+            memory_stats.dump(path)
+            self.status_label.setText(f"Stats saved to {path}")
+            self.status_label.setStyleSheet("color: green")
+        except Exception as e:
+            print('Dump Stats Exception:', e)
+            self.status_label.setText("Could not save stats")
+            self.status_label.setStyleSheet("color: red")
+
     def on_profile_selected(self, item):
         self.profile_lineEdit.setText(item.text())
     
@@ -507,6 +553,14 @@ class MainWindowTab(QWidget):
                      self.smartHotkeysTab_instance.set_smart_hotkey_thread.stop()
                 self.smartHotkeysTab_instance.set_smart_hotkey_thread.wait()
 
+        # Stop State Poller and Frame Service last, the threads above may still be reading from them
+        if self.frame_service_thread:
+            self.frame_service_thread.stop()
+            self.frame_service_thread.wait()
+        if self.state_poller_thread:
+            self.state_poller_thread.stop()
+            self.state_poller_thread.wait()
+
         event.accept()
 
     def update_timer(self):
@@ -0,0 +1,43 @@
+import time
+from PyQt5.QtCore import QThread
+
+import Addresses
+from Functions.MemoryFunctions import game_state, read_game_snapshot, read_target_info_direct
+
+
+class StatePollerThread(QThread):
+    """
+    Reads the game state once per Addresses.state_poll_interval ms and publishes it
+    to game_state, so Heal/Attack/Spell/Target/Walker/SmartHotkeys share one read per tick.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.running = True
+
+    def run(self):
+        while self.running:
+            interval = Addresses.state_poll_interval / 1000
+            started = time.monotonic()
+            try:
+                snapshot = read_game_snapshot()
+                if snapshot is not None:
+                    target = None
+                    if snapshot.target_id:
+                        # A failed target read must not cost the player state, consumers read it directly
+                        try:
+                            target = read_target_info_direct()
+                        except Exception as e:
+                            print("StatePollerThread target error:", e)
+                    else:
+                        target = (0, 0, 0, "", 0)
+                    # Consumers fall back to direct reads if we miss three ticks
+                    game_state.publish(snapshot, target, interval * 3)
+            except Exception as e:
+                print("StatePollerThread error:", e)
+            elapsed = time.monotonic() - started
+            QThread.msleep(max(1, int((interval - elapsed) * 1000)))
+        game_state.stop_publishing()
+
+    def stop(self):
+        self.running = False
@@ -27,27 +27,42 @@ class HealThread(QThread):
     def run(self):
         while self.running:
             try:
+                version = game_state.version
+                triggered = False
                 for heal_data in self.healing_data:
                     if not self.running: break
                     heal_type, heal_option, heal_below, heal_above, heal_min_mp = read_heal_data(heal_data)
                     current_hp, current_max_hp, current_mp, current_max_mp = read_my_stats()
                     hp_percentage = (current_hp * 100) / current_max_hp
                     mp_percentage = (current_mp * 100) / current_max_mp
+                    healed = False
                     if heal_type.startswith("HP"):
                         if heal_option == "Health":
                             if heal_below >= hp_percentage >= heal_above:
                                 mouse_function(coordinates_x[5], coordinates_y[5], Addresses.coordinates_x[0], Addresses.coordinates_y[0], option=5)
+                                healed = True
                         else:
                             if heal_below >= hp_percentage >= heal_above and current_mp >= heal_min_mp:
                                 press_hotkey(int(heal_option[1:]))
+                                healed = True
                     elif heal_type.startswith("MP"):
                         if heal_below >= mp_percentage >= heal_above and current_hp >= heal_min_mp:
                             if heal_option == "Mana":
                                 mouse_function(coordinates_x[11], coordinates_y[11], Addresses.coordinates_x[0], Addresses.coordinates_y[0], option=5)
                             else:
                                 press_hotkey(int(heal_option[1:]))
+                            healed = True
+                    if healed:
+                        triggered = True
+                        QThread.msleep(random.randint(10, 20))
+                if triggered:
+                    # A rule still fires, e.g. the last heal was exhausted: retry right away
+                    continue
+                if game_state.latest() is not None:
+                    # Idle, react to the next HP/MP change and re-check now and then anyway
+                    game_state.wait_for_event((EVENT_STATS_CHANGED,), version, 0.1)
+                else:
                     QThread.msleep(random.randint(10, 20))
-                QThread.msleep(random.randint(10, 20))
             except Exception as e:
                 print("Exception: ", e)
 
@@ -79,6 +94,11 @@ class AttackThread(QThread):
     def run(self):
         while self.running:
             try:
+                version = game_state.version
+                if read_targeting_status() == 0 and game_state.latest() is not None:
+                    # Nothing to attack, sleep until a target is acquired
+                    game_state.wait_for_event((EVENT_TARGET_ACQUIRED,), version, 0.2)
+                    continue
                 if not attack_Lock.locked():
                     for attack_data in self.attack_data_list:
                         if not self.running: break
@@ -1,6 +1,8 @@
 import random
 import os
-import win32gui
+import queue
+import time
+from collections import namedtuple
 
 import numpy as np
 from PyQt5.QtCore import QThread, QMutex, QMutexLocker
@@ -8,12 +10,27 @@ from PyQt5.QtWidgets import QLabel, QComboBox
 
 import Addresses
 from Addresses import coordinates_x, coordinates_y, screen_width, screen_height, screen_x, screen_y, walker_Lock
-from Functions.GeneralFunctions import WindowCapture, merge_close_points
+from Functions.GeneralFunctions import capture_session, FrameChangeDetector, frame_store
+from Functions.MemoryFunctions import read_my_wpt
+from Functions.KeyboardFunctions import press_hotkey
 from Functions.MouseFunctions import manage_collect, mouse_function
+from Functions.VisionFunctions import TemplateMatcher, SlotClassifier, match_executor, template_store
+from Platform.PlatformAbstraction import window_api
 import cv2 as cv
 
+# Capture region -> (slot grid, monotonic time it was learnt)
+slot_grids = {}
+
+# Corpse queued by the targeting thread: screen position and map tile at the kill, monotonic kill time,
+# creature name and skinning hotkey (0 for none)
+CorpseJob = namedtuple('CorpseJob', ['x', 'y', 'tile', 'timestamp', 'name', 'skin'])
+
 
 class LootThread(QThread):
+    # Seconds a learnt slot grid is trusted before a full pass checks it again
+    GRID_INTERVAL = 30.0
+    # Passes of a one-shot thread, it stops earlier once a pass finds nothing to loot
+    MAX_PASSES = 10
 
     def __init__(self, loot_data, target_state, one_shot=False):
         super().__init__()
@@ -23,11 +40,29 @@ class LootThread(QThread):
         self.state_lock = QMutex()
         self.item_templates = {}
         self.one_shot = one_shot
+        self.frame_changes = FrameChangeDetector()
+        self.preprocess_buffers = {}
+        self.matcher = TemplateMatcher(resize_factor=3, mode='upscaled' if Addresses.loot_matching == 'upscaled' else 'native')
+        # Slot by slot classification of container windows, see SlotClassifier
+        self.slots = SlotClassifier() if Addresses.loot_matching == 'slots' else None
+        self.template_margin = 0
 
     def run(self):
         self.prepare_templates()
+        capture_screen = capture_session(*self.capture_area())
 
-        # Calculate capture area
+        # If one_shot, we don't loop continuously
+        if self.one_shot:
+            self.loot_until_done(capture_screen)
+        else:
+            while self.running:
+                try:
+                    self.process_looting(capture_screen)
+                except Exception as e:
+                    print(f"Looting error: {e}")
+
+    def capture_area(self):
+        """Loot area as (w, h, x, y) in client coordinates"""
         w = screen_width[0] - screen_x[0]
         h = screen_height[0] - screen_y[0]
         x = screen_x[0]
@@ -37,7 +72,7 @@ class LootThread(QThread):
         if w <= 0 or h <= 0:
             try:
                 if Addresses.game:
-                    rect = win32gui.GetClientRect(Addresses.game)
+                    rect = window_api.get_client_rect(Addresses.game)
                     w = rect[2]
                     h = rect[3]
                     # Default to client area offsets if not set
@@ -45,88 +80,120 @@ class LootThread(QThread):
                     if y == Addresses.TITLE_BAR_OFFSET: y = Addresses.TITLE_BAR_OFFSET # Keep default offset
             except Exception as e:
                 print(f"Error calculating fallback dimensions: {e}")
+        return w, h, x, y
 
-        capture_screen = WindowCapture(w, h, x, y)
-
-        # If one_shot, we don't loop continuously
-        if self.one_shot:
-            for _ in range(2):
-                self.process_looting(capture_screen)
-        else:
-            while self.running:
-                try:
-                    self.process_looting(capture_screen)
-                except Exception as e:
-                    print(f"Looting error: {e}")
+    def loot_until_done(self, capture_screen, deadline=None):
+        """
+        Loot passes until one acts on nothing, after at least two like before (the container
+        may not be open on the first one), at most MAX_PASSES or until the monotonic deadline
+        """
+        for index in range(self.MAX_PASSES):
+            if not self.running or (deadline is not None and time.monotonic() > deadline):
+                return
+            if not self.process_looting(capture_screen) and index >= 1:
+                return
 
     def process_looting(self, capture_screen):
-        resize_factor = 3
-        for image_path, data in self.item_templates.items():
-            if not self.running:
-                break
-        
-            action = data['action']
-            templates = data['templates']
-            screenshot = capture_screen.get_screenshot()
-            screenshot = cv.cvtColor(screenshot, cv.COLOR_BGR2GRAY)
-            screenshot = cv.GaussianBlur(screenshot, (7, 7), 0)
-            screenshot = cv.resize(screenshot, None, fx=resize_factor, fy=resize_factor, interpolation=cv.INTER_CUBIC)
-            for template in templates:
+        """
+        One loot pass: capture once, preprocess once, match every template against it
+        and act on every hit. Returns True if something was looted.
+        """
+        frame, sequence = capture_screen.get_frame()
+        gray = cv.cvtColor(frame, cv.COLOR_BGRA2GRAY)
+        regions = self.frame_changes.changed_regions(gray, self.template_margin, sequence)
+        if not regions:
+            # Nothing moved in the loot area, wait for the next frame
+            if sequence:
+                frame_store.wait_for_frame(sequence, 0.1)
+            else:
+                QThread.msleep(50)
+            return False
+        items = list(self.item_templates.items())
+        hits = self.detect_items(gray, regions, (capture_screen.x, capture_screen.y, capture_screen.w, capture_screen.h))
+
+        acted = False
+        for path, data in items:
+            for lx, ly in hits[path]:
                 if not self.running:
-                    break
-                result = cv.matchTemplate(screenshot, template, cv.TM_CCOEFF_NORMED)
-                locations = np.where(result >= Addresses.collect_threshold)
-                all_locations = []
-                for pt in zip(*locations[::-1]):
-                    x = int(pt[0])
-                    y = int(pt[1])
-                    all_locations.append((x, y))
-                if all_locations:
-                    all_locations = merge_close_points(all_locations, 30)
-                    all_locations = sorted(all_locations, key=lambda point: (point[1], point[0]))
-                    for lx,ly in all_locations:
-                        lx_scaled = lx / resize_factor
-                        ly_scaled = ly / resize_factor
-                        self.perform_action(lx_scaled, ly_scaled, action, data.get('use_ctrl', False))
-        
+                    return acted
+                self.perform_action(lx, ly, data['action'], data.get('use_ctrl', False))
+                acted = True
+        if acted:
+            # Looted items shift the others, the next pass matches the whole area on a new frame
+            self.frame_changes.full_at = 0
+        return acted
+
+    def detect_items(self, gray, regions, grid_key):
+        """
+        Positions of every item in the regions of the gray loot area frame, as a dict of
+        image path -> [(x, y)] top-left corners, in the order of the loot list
+        """
+        items = list(self.item_templates.items())
+        slot_hits = {}
+        if self.slots is not None:
+            # Shared with the one-shot threads of the next corpses, containers may have moved since
+            grid, learnt = slot_grids.get(grid_key, (None, 0))
+            self.slots.grid = grid if time.monotonic() - learnt <= self.GRID_INTERVAL else None
+        if self.slots is not None and self.slots.grid is not None:
+            slot_hits = self.slots.classify(gray, Addresses.collect_threshold, regions)
+            # Frames of another size than the slots are not indexed, match them instead
+            matched = [(path, [template for template in data['templates'] if template.native.shape != self.slots.shape])
+                       for path, data in items]
+            matched = [(path, templates) for path, templates in matched if templates]
+        else:
+            matched = [(path, data['templates']) for path, data in items]
+
+        item_hits = {}
+        if matched:
+            self.matcher.set_images(self.preprocess(gray, regions))
+            templates = [template for path, path_templates in matched for template in path_templates]
+            hits = iter(self.matcher.match_all(templates, Addresses.collect_threshold, match_executor()))
+            for path, path_templates in matched:
+                item_hits[path] = [hit for _ in path_templates for hit in next(hits)]
+            if self.slots is not None and self.slots.grid is None:
+                all_hits = [hit for path_hits in item_hits.values() for hit in path_hits]
+                if self.slots.learn_grid(gray, all_hits):
+                    slot_grids[grid_key] = (self.slots.grid, time.monotonic())
+
+        return {path: slot_hits.get(path, []) + item_hits.get(path, []) for path, data in items}
+
+    def preprocess(self, gray, regions):
+        """Blurred regions of the gray frame as (x, y, image), the matcher upscales what it needs"""
+        screenshots = []
+        for rx, ry, rw, rh in regions:
+            # Reused by the passes that process the same region
+            blurred = self.preprocess_buffers.get((rx, ry, rw, rh))
+            if blurred is None:
+                blurred = np.empty((rh, rw), dtype=np.uint8)
+                if len(self.preprocess_buffers) >= 32:
+                    self.preprocess_buffers.clear()
+                self.preprocess_buffers[(rx, ry, rw, rh)] = blurred
+            cv.GaussianBlur(gray[ry:ry + rh, rx:rx + rw], (7, 7), 0, dst=blurred)
+            screenshots.append((rx, ry, blurred))
+        return screenshots
+
     def prepare_templates(self):
-        resize_factor = 3
         """Load and prepare all item templates"""
         self.item_templates.clear()
+        self.template_margin = 0
         for entry in self.loot_data:
             image_path = entry.get("ImagePath")
             if image_path and os.path.exists(image_path):
                 action = entry.get("Action", "RightClick")
                 use_ctrl = entry.get("UseCtrl", False)
 
-                templates_list = []
-                if image_path.lower().endswith('.gif'):
-                    try:
-                        from PIL import Image, ImageSequence
-                        import numpy as np
-
-                        gif = Image.open(image_path)
-
-                        for frame in ImageSequence.Iterator(gif):
-                            frame = np.array(frame.convert('RGB'))
-                            frame = frame[:22, :]
-                            opencv_image = cv.cvtColor(frame, cv.COLOR_BGR2GRAY)
-                            item = cv.GaussianBlur(opencv_image, (7, 7), 0)
-                            item = cv.resize(item, None, fx=resize_factor, fy=resize_factor,interpolation=cv.INTER_CUBIC)
-                            templates_list.append(item)
-
-                    except Exception as e:
-                        print(f"Error loading GIF template: {e}")
-                        continue
-                else:
-                    template = cv.imread(image_path, cv.IMREAD_GRAYSCALE)
-                    if template is not None:
-                        template = template[:22, :]
-                        item = cv.GaussianBlur(template, (7, 7), 0)
-                        item = cv.resize(item, None, fx=resize_factor, fy=resize_factor, interpolation=cv.INTER_CUBIC)
-                        templates_list.append(item)
+                try:
+                    templates_list = template_store.get(image_path, self.matcher.resize_factor)
+                except Exception as e:
+                    print(f"Error loading template {image_path}: {e}")
+                    continue
 
                 if templates_list:
+                    if self.slots is not None:
+                        self.slots.add_templates(image_path, templates_list)
+                    # Blur border plus the largest template, in capture pixels
+                    largest = max(max(item.native.shape) for item in templates_list)
+                    self.template_margin = max(self.template_margin, largest + 4)
                     self.item_templates[image_path] = {
                         'action': action,
                         'templates': templates_list,
@@ -167,3 +234,84 @@ class LootThread(QThread):
 
     def stop(self):
         self.running = False
+
+
+class LootWorker(LootThread):
+    """
+    Long lived loot thread of a targeting thread. Corpses are queued with add_corpse and
+    opened and looted in order while targeting goes on, the templates stay prepared.
+    """
+    # Corpses not opened this many seconds after the kill are dropped
+    JOB_TIMEOUT = 10.0
+    # Tiles visible around the character, farther corpses can't be clicked
+    VISIBLE_TILES = (7, 5)
+    # Milliseconds between the kill and the corpse being there to open
+    CORPSE_DELAY = (1000, 1500)
+
+    def __init__(self, loot_data, target_state):
+        super().__init__(loot_data, target_state, one_shot=True)
+        self.jobs = queue.Queue()
+
+    def add_corpse(self, x, y, tile, name, skin=0):
+        """Queue the corpse of a creature killed now, returns immediately"""
+        self.jobs.put(CorpseJob(x, y, tile, time.monotonic(), name, skin))
+
+    def run(self):
+        self.prepare_templates()
+        capture_screen = capture_session(*self.capture_area())
+        while self.running:
+            try:
+                job = self.jobs.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            try:
+                self.process_corpse(job, capture_screen)
+            except Exception as e:
+                print(f"Looting error: {e}")
+
+    def process_corpse(self, job, capture_screen):
+        """Open the corpse of a job and loot it like a one-shot thread, within JOB_TIMEOUT of the kill"""
+        delay = job.timestamp + random.randint(*self.CORPSE_DELAY) / 1000 - time.monotonic()
+        if delay > 0:
+            QThread.msleep(int(delay * 1000))
+        if time.monotonic() - job.timestamp > self.JOB_TIMEOUT:
+            print(f"Corpse of {job.name} dropped, killed {time.monotonic() - job.timestamp:.0f} s ago")
+            return
+        position = self.corpse_position(job)
+        if position is None:
+            print(f"Corpse of {job.name} out of sight")
+            return
+        if not self.running:
+            return
+        corpse_x, corpse_y = position
+        mouse_function(corpse_x, corpse_y, option=1)
+        QThread.msleep(random.randint(300, 500)) # Small delay to allow container to open
+
+        # Full first pass, the open container is new
+        self.frame_changes.full_at = 0
+        self.loot_until_done(capture_screen, job.timestamp + self.JOB_TIMEOUT)
+        if job.skin:
+            press_hotkey(job.skin)
+            QThread.msleep(random.randint(10, 50))
+            mouse_function(corpse_x, corpse_y, option=2)
+            QThread.msleep(random.randint(150, 250))
+
+    def corpse_position(self, job):
+        """Screen position of the corpse, moved by the steps taken since the kill, None when out of sight"""
+        x, y, z = read_my_wpt()
+        if job.tile is None or x is None:
+            return job.x, job.y
+        tile_x, tile_y, tile_z = job.tile
+        dx, dy = tile_x - x, tile_y - y
+        if tile_z != z or abs(dx) > self.VISIBLE_TILES[0] or abs(dy) > self.VISIBLE_TILES[1]:
+            return None
+        return coordinates_x[0] + dx * Addresses.square_size, coordinates_y[0] + dy * Addresses.square_size
+
+    def stop(self):
+        super().stop()
+        # Nothing left to loot once the targeting stops
+        while not self.jobs.empty():
+            try:
+                self.jobs.get_nowait()
+            except queue.Empty:
+                break
@@ -0,0 +1,201 @@
+"""
+Offline memory dumps of an attached client.
+MemoryDumpRecorder copies the pages holding the values the bot reads into a dump
+file at a fixed rate. ReplayMemoryAPI serves reads from that file, so the thread
+logic can be run and profiled without a game client.
+
+Dump file layout (little endian):
+    header  magic 'OTMD', version, page size, base address, frame count
+    frame   timestamp (seconds since the first frame), page count,
+            page count x page address, page count x page data
+A frame only stores the pages that changed since the previous frame.
+"""
+import bisect
+import mmap
+import os
+import struct
+import sys
+import time
+from ctypes import c_char, c_void_p
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Platform.PlatformAbstraction import memory_api
+
+DUMP_MAGIC = b'OTMD'
+DUMP_VERSION = 1
+DUMP_PAGE_SIZE = 4096
+DUMP_HEADER = struct.Struct('<4sIIQQ')
+FRAME_HEADER = struct.Struct('<dI')
+
+
+class MemoryDumpRecorder:
+    """
+    Records the pages covering ranges_function() of a process into path.
+    ranges_function returns (address, size) ranges and is called every frame,
+    so pointer chains and the current target are followed while recording.
+    """
+
+    def __init__(self, path, process_handle, ranges_function, base_address=0, rate=20):
+        self.path = path
+        self.process_handle = process_handle
+        self.ranges_function = ranges_function
+        self.interval = 1 / rate
+        self.frame_count = 0
+        self.started = None
+        self.pages = {}
+        self.file = open(path, 'wb')
+        self.file.write(DUMP_HEADER.pack(DUMP_MAGIC, DUMP_VERSION, DUMP_PAGE_SIZE, base_address, 0))
+
+    def capture_frame(self):
+        """Copies the current pages and appends the ones that changed as a new frame"""
+        now = time.monotonic()
+        if self.started is None:
+            self.started = now
+        page_addresses = set()
+        for address, size in self.ranges_function():
+            page = address - address % DUMP_PAGE_SIZE
+            while page < address + size:
+                page_addresses.add(page)
+                page += DUMP_PAGE_SIZE
+
+        page_addresses = sorted(page_addresses)
+        page_data = bytearray(len(page_addresses) * DUMP_PAGE_SIZE)
+        requests = [(page, (c_char * DUMP_PAGE_SIZE).from_buffer(page_data, i * DUMP_PAGE_SIZE), DUMP_PAGE_SIZE)
+                    for i, page in enumerate(page_addresses)]
+        results = memory_api.read_process_memory_vectored(self.process_handle, requests, partial=True)
+
+        changed = []
+        for i, (page, ok) in enumerate(zip(page_addresses, results)):
+            data = bytes(page_data[i * DUMP_PAGE_SIZE:(i + 1) * DUMP_PAGE_SIZE])
+            if ok and self.pages.get(page) != data:
+                self.pages[page] = data
+                changed.append(page)
+        self.file.write(FRAME_HEADER.pack(now - self.started, len(changed)))
+        self.file.write(struct.pack(f'<{len(changed)}Q', *changed))
+        for page in changed:
+            self.file.write(self.pages[page])
+        self.frame_count += 1
+        return len(changed)
+
+    def record(self, duration, running=None):
+        """Captures frames at the configured rate for duration seconds, or until running() is False"""
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline and (running is None or running()):
+            started = time.monotonic()
+            self.capture_frame()
+            time.sleep(max(0, self.interval - (time.monotonic() - started)))
+        return self.frame_count
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.file.seek(DUMP_HEADER.size - 8)
+        self.file.write(struct.pack('<Q', self.frame_count))
+        self.file.close()
+
+
+class ReplayMemoryAPI:
+    """
+    Serves MemoryAPI reads from a dump file mapped with mmap.
+    speed=1.0 plays the frames back in real time, higher values accelerate them,
+    and speed=None only moves between frames through step() and seek().
+    Install it with memory_api.use_replay(replay).
+    """
+
+    def __init__(self, path, speed=1.0, loop=False):
+        self.file = open(path, 'rb')
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.page_size, self.base_address, frame_count = DUMP_HEADER.unpack_from(self.mm)
+        if magic != DUMP_MAGIC or version != DUMP_VERSION:
+            raise ValueError(f"{path} is not a memory dump")
+        self.speed = speed
+        self.loop = loop
+        self.timestamps = []
+        # Page address -> offset of its data in the file, one cumulative map per frame
+        self.frames = []
+        pages = {}
+        position = DUMP_HEADER.size
+        while position + FRAME_HEADER.size <= len(self.mm) and len(self.frames) < (frame_count or sys.maxsize):
+            timestamp, page_count = FRAME_HEADER.unpack_from(self.mm, position)
+            position += FRAME_HEADER.size
+            page_addresses = struct.unpack_from(f'<{page_count}Q', self.mm, position)
+            position += page_count * 8
+            if position + page_count * self.page_size > len(self.mm):
+                break  # Recording was interrupted mid frame
+            pages = dict(pages)
+            for page in page_addresses:
+                pages[page] = position
+                position += self.page_size
+            self.timestamps.append(timestamp)
+            self.frames.append(pages)
+        if not self.frames:
+            raise ValueError(f"{path} has no frames")
+        self.frame = 0
+        self.started = time.monotonic()
+        self.backend = 'replay'
+
+    @property
+    def duration(self):
+        return self.timestamps[-1]
+
+    def current_pages(self):
+        if self.speed is not None:
+            elapsed = (time.monotonic() - self.started) * self.speed
+            if self.loop and self.duration > 0:
+                elapsed %= self.duration
+            self.frame = max(0, bisect.bisect_right(self.timestamps, elapsed) - 1)
+        return self.frames[self.frame]
+
+    def seek(self, frame):
+        self.frame = min(max(frame, 0), len(self.frames) - 1)
+
+    def step(self):
+        """Moves to the next frame, returns False at the end of the dump"""
+        if self.frame + 1 >= len(self.frames):
+            return False
+        self.frame += 1
+        return True
+
+    def restart(self):
+        self.frame = 0
+        self.started = time.monotonic()
+
+    def read_process_memory(self, process_handle, address, buffer, size):
+        if isinstance(address, c_void_p):
+            address = address.value
+        pages = self.current_pages()
+        destination = memoryview(buffer).cast('B')
+        copied = 0
+        while copied < size:
+            page_offset = (address + copied) % self.page_size
+            offset = pages.get(address + copied - page_offset)
+            if offset is None:
+                return False
+            count = min(size - copied, self.page_size - page_offset)
+            destination[copied:copied + count] = self.mm[offset + page_offset:offset + page_offset + count]
+            copied += count
+        return True
+
+    def read_process_memory_vectored(self, process_handle, requests, partial=False):
+        results = [self.read_process_memory(process_handle, address, buffer, size)
+                   for address, buffer, size in requests]
+        return results if partial else all(results)
+
+    def read_into(self, process_handle, address, buffer):
+        size = len(memoryview(buffer).cast('B'))
+        return size if self.read_process_memory(process_handle, address, buffer, size) else 0
+
+    def enumerate_regions(self, process_handle, max_address=None):
+        """Runs of consecutive recorded pages of the current frame"""
+        regions = []
+        for page in sorted(self.current_pages()):
+            if max_address is not None and page >= max_address:
+                break
+            if regions and regions[-1][0] + regions[-1][1] == page:
+                regions[-1][1] += self.page_size
+            else:
+                regions.append([page, self.page_size])
+        return [tuple(region) for region in regions]
+
+    def close(self):
+        self.mm.close()
+        self.file.close()
@@ -3,8 +3,11 @@ Multi-platform abstraction layer for Windows and Linux support.
 Provides unified interface for memory operations, window management, and input simulation.
 """
 
+import os
 import platform
 import sys
+import threading
+import time
 
 PLATFORM = platform.system()
 IS_WINDOWS = PLATFORM == 'Windows'
@@ -32,16 +35,49 @@ else:  # Linux
 
 import ctypes as c
 from ctypes import c_void_p, c_size_t, c_int, c_uint, c_long, c_ulong, POINTER, byref
+from ctypes.util import find_library
 
 
 # ============================================================================
 # MEMORY OPERATIONS
 # ============================================================================
 
+class iovec(c.Structure):
+    """struct iovec used by process_vm_readv"""
+    _fields_ = [
+        ("iov_base", c_void_p),
+        ("iov_len", c_size_t)
+    ]
+
+
+# Structure for VirtualQueryEx
+class MEMORY_BASIC_INFORMATION(c.Structure):
+    _fields_ = [
+        ("BaseAddress", c.c_void_p),
+        ("AllocationBase", c.c_void_p),
+        ("AllocationProtect", c.c_uint32),
+        ("RegionSize", c.c_size_t),
+        ("State", c.c_uint32),
+        ("Protect", c.c_uint32),
+        ("Type", c.c_uint32),
+    ]
+
+
+# Linux read backends
+BACKEND_PROCESS_VM_READV = 'process_vm_readv'
+BACKEND_PROC_MEM = 'proc_mem'  # pread on a persistent /proc/<pid>/mem descriptor
+LINUX_BACKENDS = (BACKEND_PROCESS_VM_READV, BACKEND_PROC_MEM)
+
+
 class MemoryAPI:
     """Cross-platform memory operations"""
     
     def __init__(self):
+        # Persistent /proc/<pid>/mem descriptors used for bulk reads on Linux
+        self.mem_fds = {}
+        # ReplayMemoryAPI serving every read from a memory dump instead of a process
+        self.replay = None
+        self.backend = BACKEND_PROCESS_VM_READV
         if IS_WINDOWS:
             self.kernel32 = c.windll.kernel32
         else:  # Linux
@@ -49,9 +85,9 @@ class MemoryAPI:
             # Linux process_vm_readv for memory reading
             self.libc.process_vm_readv.argtypes = [
                 c_int,  # pid
-                POINTER(c.c_void_p),  # local_iov
+                POINTER(iovec),  # local_iov
                 c_ulong,  # liovcnt
-                POINTER(c.c_void_p),  # remote_iov
+                POINTER(iovec),  # remote_iov
                 c_ulong,  # riovcnt
                 c_ulong   # flags
             ]
@@ -59,6 +95,10 @@ class MemoryAPI:
     
     def read_process_memory(self, process_handle, address, buffer, size):
         """Read memory from a process"""
+        if isinstance(address, c_void_p):
+            address = address.value
+        if self.replay is not None:
+            return self.replay.read_process_memory(process_handle, address, buffer, size)
         if IS_WINDOWS:
             result = self.kernel32.ReadProcessMemory(
                 process_handle, 
@@ -68,17 +108,15 @@ class MemoryAPI:
                 byref(c_size_t())
             )
             return bool(result)
+        elif self.backend == BACKEND_PROC_MEM:
+            try:
+                return os.preadv(self.get_mem_fd(process_handle), [memoryview(buffer).cast('B')[:size]], address) == size
+            except OSError:
+                return False
         else:  # Linux
             # Linux implementation using process_vm_readv
             pid = process_handle  # On Linux, we use PID directly
             
-            # Setup iovec structures
-            class iovec(c.Structure):
-                _fields_ = [
-                    ("iov_base", c_void_p),
-                    ("iov_len", c_size_t)
-                ]
-            
             local = iovec(c.cast(buffer, c_void_p), size)
             remote = iovec(c_void_p(address), size)
             
@@ -89,7 +127,157 @@ class MemoryAPI:
                 0
             )
             return result == size
-    
+
+    def read_process_memory_vectored(self, process_handle, requests, partial=False):
+        """
+        Read several (address, buffer, size) ranges at once.
+        On Linux with process_vm_readv all ranges go through a single call.
+        Returns True only if every range was read completely, or with partial=True
+        a list with one bool per range so readable ranges survive an unmapped one.
+        """
+        if self.replay is not None:
+            return self.replay.read_process_memory_vectored(process_handle, requests, partial)
+        if IS_WINDOWS or self.backend == BACKEND_PROC_MEM:
+            results = [self.read_process_memory(process_handle, address, buffer, size)
+                       for address, buffer, size in requests]
+            return results if partial else all(results)
+        results = [False] * len(requests)
+        start = 0
+        while start < len(requests):
+            count = len(requests) - start
+            local = (iovec * count)()
+            remote = (iovec * count)()
+            for i, (address, buffer, size) in enumerate(requests[start:]):
+                if isinstance(address, c_void_p):
+                    address = address.value
+                local[i].iov_base = c.cast(buffer, c_void_p)
+                local[i].iov_len = size
+                remote[i].iov_base = address
+                remote[i].iov_len = size
+            # process_vm_readv stops at the first remote iovec that cannot be read,
+            # so a short count means the range after the last complete one failed
+            remaining = self.libc.process_vm_readv(process_handle, local, count, remote, count, 0)
+            for i in range(start, len(requests)):
+                size = requests[i][2]
+                if remaining < size:
+                    start = i + 1
+                    break
+                results[i] = True
+                remaining -= size
+            else:
+                break
+            if not partial:
+                return False
+        return results if partial else True
+
+    def enumerate_regions(self, process_handle, max_address=None):
+        """
+        Yield (start, size) for every readable, committed region of a process.
+        On Linux only private writable mappings are listed, which is where game objects live.
+        """
+        if self.replay is not None:
+            yield from self.replay.enumerate_regions(process_handle, max_address)
+        elif IS_WINDOWS:
+            mbi = MEMORY_BASIC_INFORMATION()
+            current_address = 0
+            while max_address is None or current_address < max_address:
+                if not self.kernel32.VirtualQueryEx(process_handle, c_void_p(current_address), byref(mbi), c.sizeof(mbi)):
+                    break
+                # Committed and not NOACCESS or GUARD
+                if mbi.State == 0x1000 and not (mbi.Protect & (0x100 | 0x01)):
+                    yield current_address, mbi.RegionSize
+                current_address += mbi.RegionSize
+        else:  # Linux
+            with open(f"/proc/{process_handle}/maps", "r") as maps:
+                for line in maps:
+                    fields = line.split()
+                    perms = fields[1]
+                    if perms[0] != 'r' or perms[1] != 'w' or perms[3] != 'p':
+                        continue
+                    if len(fields) > 5 and fields[5] in ('[vvar]', '[vsyscall]'):
+                        continue
+                    start, end = (int(value, 16) for value in fields[0].split('-'))
+                    if max_address is not None and start >= max_address:
+                        break
+                    yield start, end - start
+
+    def read_into(self, process_handle, address, buffer):
+        """
+        Read len(buffer) bytes into a writable buffer (bytearray/memoryview).
+        Returns the number of bytes read, which is short when the range ends in unmapped memory.
+        """
+        if self.replay is not None:
+            return self.replay.read_into(process_handle, address, buffer)
+        if IS_WINDOWS:
+            size = len(buffer)
+            bytes_read = c_size_t()
+            local = (c.c_char * size).from_buffer(buffer)
+            if not self.kernel32.ReadProcessMemory(process_handle, c_void_p(address), local, size, byref(bytes_read)):
+                return 0
+            return bytes_read.value
+        else:  # Linux
+            try:
+                return os.preadv(self.get_mem_fd(process_handle), [buffer], address)
+            except OSError:
+                return 0
+
+    def get_mem_fd(self, process_handle):
+        """Persistent /proc/<pid>/mem descriptor, opened on first use"""
+        fd = self.mem_fds.get(process_handle)
+        if fd is None:
+            fd = os.open(f"/proc/{process_handle}/mem", os.O_RDONLY)
+            self.mem_fds[process_handle] = fd
+        return fd
+
+    def benchmark_backends(self, process_handle, address, size=64, iterations=2000):
+        """Times every Linux backend reading address, returns {backend: seconds} for the ones that work"""
+        results = {}
+        if IS_WINDOWS:
+            return results
+        buffer = c.create_string_buffer(size)
+        previous = self.backend
+        for backend in LINUX_BACKENDS:
+            self.backend = backend
+            try:
+                if not self.read_process_memory(process_handle, address, buffer, size):
+                    continue
+                started = time.perf_counter()
+                for _ in range(iterations):
+                    self.read_process_memory(process_handle, address, buffer, size)
+                results[backend] = time.perf_counter() - started
+            except OSError:
+                # e.g. /proc/<pid>/mem not accessible under the current ptrace policy
+                continue
+        self.backend = previous
+        return results
+
+    def select_backend(self, process_handle, address, backend='auto'):
+        """
+        Picks the read backend for an attached process. 'auto' benchmarks every
+        backend on address and keeps the fastest one that works.
+        """
+        if IS_WINDOWS or self.replay is not None:
+            return self.backend
+        if backend in LINUX_BACKENDS:
+            self.backend = backend
+            return self.backend
+        results = self.benchmark_backends(process_handle, address)
+        if results:
+            self.backend = min(results, key=results.get)
+            timings = ", ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in results.items())
+            print(f"Memory backend: {self.backend} ({timings})")
+        return self.backend
+
+    def use_replay(self, replay):
+        """Serve every read from a ReplayMemoryAPI, or from the process again with None"""
+        self.replay = replay
+
+    def close_process(self, process_handle):
+        """Release descriptors kept open for a process"""
+        fd = self.mem_fds.pop(process_handle, None)
+        if fd is not None:
+            os.close(fd)
+
     def open_process(self, pid):
         """Open a process and return handle"""
         if IS_WINDOWS:
@@ -100,6 +288,19 @@ class MemoryAPI:
             # No handle needed, process_vm_readv uses PID directly
             return pid
     
+    def get_base_address(self, process_handle):
+        """Base address of the main module of an opened process"""
+        if IS_WINDOWS:
+            return win32process.EnumProcessModules(process_handle)[0]
+        else:  # Linux
+            # Lowest mapping of the executable
+            executable = os.readlink(f"/proc/{process_handle}/exe")
+            with open(f"/proc/{process_handle}/maps", "r") as maps:
+                for line in maps:
+                    if line.rstrip().endswith(executable):
+                        return int(line.split('-')[0], 16)
+            return 0
+    
     def enable_debug_privilege(self):
         """Enable debug privileges (Windows only)"""
         if IS_WINDOWS:
@@ -118,17 +319,131 @@ class MemoryAPI:
         return True
 
 
+class MemoryReader:
+    """
+    Reads process memory into buffers allocated once at construction.
+    read() leaves the bytes at the start of self.view, a persistent memoryview
+    to decode with struct.unpack_from, valid until the next read. Batches of
+    ranges are prepared once and then re-read with a single call and no
+    per-call setup. Not thread safe, give every thread its own reader.
+    """
+
+    def __init__(self, size=4096, max_ranges=64):
+        self.size = size
+        self.data = bytearray(size)
+        self.view = memoryview(self.data)
+        self.c_data = (c.c_char * size).from_buffer(self.data)
+        self.data_address = c.addressof(self.c_data)
+        if IS_WINDOWS:
+            self.bytes_read = c_size_t()
+            self.bytes_read_ref = byref(self.bytes_read)
+            self.read_memory = c.windll.kernel32.ReadProcessMemory
+        else:  # Linux
+            self.local = iovec(self.data_address, 0)
+            self.remote = iovec(0, 0)
+            self.local_ptr = c.pointer(self.local)
+            self.remote_ptr = c.pointer(self.remote)
+            self.readv = memory_api.libc.process_vm_readv
+            # Buffer slices for the /proc/<pid>/mem backend, one per read size
+            self.slices = {}
+        self.max_ranges = max_ranges
+
+    def read(self, process_handle, address, size):
+        """Reads size bytes from address into self.view, returns True on success"""
+        if size > self.size:
+            return False
+        if memory_api.replay is not None:
+            return memory_api.replay.read_process_memory(process_handle, address, self.data, size)
+        if IS_WINDOWS:
+            return bool(self.read_memory(process_handle, c_void_p(address), self.c_data, size, self.bytes_read_ref))
+        elif memory_api.backend == BACKEND_PROC_MEM:
+            buffers = self.slices.get(size)
+            if buffers is None:
+                buffers = self.slices[size] = (self.view[:size],)
+            try:
+                return os.preadv(memory_api.get_mem_fd(process_handle), buffers, address) == size
+            except OSError:
+                return False
+        else:  # Linux
+            self.local.iov_len = size
+            self.remote.iov_base = address
+            self.remote.iov_len = size
+            return self.readv(process_handle, self.local_ptr, 1, self.remote_ptr, 1, 0) == size
+
+    def prepare(self, ranges):
+        """
+        Lays out (address, size) ranges back to back in the buffer.
+        Returns a batch for read_batch() and the buffer offset of every range.
+        """
+        offsets = []
+        position = 0
+        for address, size in ranges:
+            offsets.append(position)
+            position += size
+        if position > self.size or len(ranges) > self.max_ranges:
+            raise ValueError("Batch does not fit in the reader buffer")
+        if IS_WINDOWS:
+            batch = [(c_void_p(address), (c.c_char * size).from_buffer(self.data, offset), size)
+                     for (address, size), offset in zip(ranges, offsets)]
+        else:  # Linux
+            count = len(ranges)
+            local = (iovec * count)()
+            remote = (iovec * count)()
+            for i, ((address, size), offset) in enumerate(zip(ranges, offsets)):
+                local[i].iov_base = self.data_address + offset
+                local[i].iov_len = size
+                remote[i].iov_base = address
+                remote[i].iov_len = size
+            preads = [(address, (self.view[offset:offset + size],), size)
+                      for (address, size), offset in zip(ranges, offsets)]
+            batch = (local, remote, count, position, preads)
+        return batch, offsets
+
+    def read_batch(self, process_handle, batch):
+        """Re-reads a prepared batch into self.view, returns True only if every range was read"""
+        if memory_api.replay is not None:
+            if IS_WINDOWS:
+                requests = batch
+            else:
+                requests = [(address, buffers[0], size) for address, buffers, size in batch[4]]
+            return memory_api.replay.read_process_memory_vectored(process_handle, requests)
+        if IS_WINDOWS:
+            for address, local, size in batch:
+                if not self.read_memory(process_handle, address, local, size, self.bytes_read_ref):
+                    return False
+            return True
+        elif memory_api.backend == BACKEND_PROC_MEM:
+            try:
+                fd = memory_api.get_mem_fd(process_handle)
+                for address, buffers, size in batch[4]:
+                    if os.preadv(fd, buffers, address) != size:
+                        return False
+                return True
+            except OSError:
+                return False
+        else:  # Linux
+            local, remote, count, total, preads = batch
+            return self.readv(process_handle, local, count, remote, count, 0) == total
+
+
 # ============================================================================
 # WINDOW MANAGEMENT
 # ============================================================================
 
-class WindowAPI:
+class LazyDisplay:
+    """Opens the X display on first use, so memory-only tools can import this module headless"""
+    x_display = None
+
+    @property
+    def display(self):
+        if self.x_display is None:
+            self.x_display = display.Display()
+        return self.x_display
+
+
+class WindowAPI(LazyDisplay):
     """Cross-platform window management"""
     
-    def __init__(self):
-        if IS_LINUX:
-            self.display = display.Display()
-    
     def find_window(self, window_title=None, class_name=None):
         """Find window by title or class name"""
         if IS_WINDOWS:
@@ -156,6 +471,15 @@ class WindowAPI:
             geom = window.get_geometry()
             return (geom.x, geom.y, geom.x + geom.width, geom.y + geom.height)
     
+    def get_client_rect(self, hwnd):
+        """Get client area rectangle (0, 0, width, height)"""
+        if IS_WINDOWS:
+            return win32gui.GetClientRect(hwnd)
+        else:  # Linux
+            window = self.display.create_resource_object('window', hwnd)
+            geom = window.get_geometry()
+            return (0, 0, geom.width, geom.height)
+    
     def is_window_visible(self, hwnd):
         """Check if window is visible"""
         if IS_WINDOWS:
@@ -207,7 +531,7 @@ class WindowAPI:
 # INPUT SIMULATION
 # ============================================================================
 
-class InputAPI:
+class InputAPI(LazyDisplay):
     """Cross-platform input simulation"""
     
     # Message constants
@@ -218,13 +542,18 @@ class InputAPI:
     WM_RBUTTONUP = 0x0205
     WM_KEYDOWN = 0x0100
     WM_KEYUP = 0x0101
-    
-    def __init__(self):
-        if IS_LINUX:
-            self.display = display.Display()
+
+    # Object with a post_message(hwnd, msg, wparam, lparam) method receiving the input instead of the window
+    sink = None
+
+    def use_sink(self, sink):
+        """Send every posted message to sink, e.g. a simulated client, or to the window again with None"""
+        self.sink = sink
     
     def post_message(self, hwnd, msg, wparam, lparam):
         """Post message to window"""
+        if self.sink is not None:
+            return self.sink.post_message(hwnd, msg, wparam, lparam)
         if IS_WINDOWS:
             return win32gui.PostMessage(hwnd, msg, wparam, lparam)
         else:  # Linux
@@ -296,18 +625,198 @@ class InputAPI:
 # SCREEN CAPTURE
 # ============================================================================
 
-class ScreenCaptureAPI:
-    """Cross-platform screen capture"""
-    
+class XShmSegmentInfo(c.Structure):
+    _fields_ = [
+        ("shmseg", c_ulong),
+        ("shmid", c_int),
+        ("shmaddr", c_void_p),
+        ("readOnly", c_int),
+    ]
+
+
+class XImage(c.Structure):
+    """Leading fields of Xlib's XImage, enough to locate the pixels"""
+    _fields_ = [
+        ("width", c_int),
+        ("height", c_int),
+        ("xoffset", c_int),
+        ("format", c_int),
+        ("data", c_void_p),
+        ("byte_order", c_int),
+        ("bitmap_unit", c_int),
+        ("bitmap_bit_order", c_int),
+        ("bitmap_pad", c_int),
+        ("depth", c_int),
+        ("bytes_per_line", c_int),
+        ("bits_per_pixel", c_int),
+    ]
+
+
+class XShmCapture:
+    """
+    X11 capture through the MIT-SHM extension (Linux only).
+    Every captured region gets one shared memory segment, mapped once, which the
+    X server fills in place, so no pixels go through the X socket. The segment is
+    copied out under the lock, a concurrent capture of the same region can't overwrite
+    a frame its caller is still reading.
+    """
+    IPC_PRIVATE = 0
+    IPC_CREAT = 0o1000
+    IPC_RMID = 0
+    Z_PIXMAP = 2
+    MAX_SEGMENTS = 16
+
     def __init__(self):
-        if IS_LINUX:
-            self.display = display.Display()
+        self.available = False
+        self.lock = threading.Lock()
+        # (hwnd, x, y, w, h) -> (XImage pointer, XShmSegmentInfo, frame view)
+        self.segments = {}
+        self.error = False
+        try:
+            self.x11 = c.CDLL(find_library("X11") or "libX11.so.6")
+            self.xext = c.CDLL(find_library("Xext") or "libXext.so.6")
+            self.libc = c.CDLL(None, use_errno=True)
+        except OSError:
+            return
+        self.x11.XOpenDisplay.restype = c_void_p
+        self.x11.XOpenDisplay.argtypes = [c.c_char_p]
+        self.x11.XDefaultScreen.argtypes = [c_void_p]
+        self.x11.XDefaultVisual.restype = c_void_p
+        self.x11.XDefaultVisual.argtypes = [c_void_p, c_int]
+        self.x11.XDefaultDepth.argtypes = [c_void_p, c_int]
+        self.x11.XSync.argtypes = [c_void_p, c_int]
+        self.x11.XFree.argtypes = [c_void_p]
+        self.xext.XShmQueryExtension.argtypes = [c_void_p]
+        self.xext.XShmCreateImage.restype = POINTER(XImage)
+        self.xext.XShmCreateImage.argtypes = [c_void_p, c_void_p, c_uint, c_int, c_void_p,
+                                              POINTER(XShmSegmentInfo), c_uint, c_uint]
+        self.xext.XShmAttach.argtypes = [c_void_p, POINTER(XShmSegmentInfo)]
+        self.xext.XShmDetach.argtypes = [c_void_p, POINTER(XShmSegmentInfo)]
+        self.xext.XShmGetImage.argtypes = [c_void_p, c_ulong, POINTER(XImage), c_int, c_int, c_ulong]
+        self.libc.shmget.argtypes = [c_int, c_size_t, c_int]
+        self.libc.shmat.restype = c_void_p
+        self.libc.shmat.argtypes = [c_int, c_void_p, c_int]
+        self.libc.shmdt.argtypes = [c_void_p]
+        self.libc.shmctl.argtypes = [c_int, c_int, c_void_p]
+
+        self.display = self.x11.XOpenDisplay(None)
+        if not self.display or not self.xext.XShmQueryExtension(self.display):
+            return
+        # A failed request must not terminate the process, it only disables the segment
+        self.error_handler = c.CFUNCTYPE(c_int, c_void_p, c_void_p)(self.on_error)
+        self.x11.XSetErrorHandler(self.error_handler)
+        screen = self.x11.XDefaultScreen(self.display)
+        self.visual = self.x11.XDefaultVisual(self.display, screen)
+        self.depth = self.x11.XDefaultDepth(self.display, screen)
+        self.available = True
+
+    def on_error(self, display, event):
+        self.error = True
+        return 0
+
+    def create_segment(self, w, h):
+        import numpy as np
+        shminfo = XShmSegmentInfo()
+        image = self.xext.XShmCreateImage(self.display, self.visual, self.depth, self.Z_PIXMAP, None,
+                                          byref(shminfo), w, h)
+        if not image:
+            return None
+        if image.contents.bits_per_pixel != 32:
+            self.x11.XFree(image)
+            return None
+        stride = image.contents.bytes_per_line
+        shminfo.shmid = self.libc.shmget(self.IPC_PRIVATE, stride * h, self.IPC_CREAT | 0o600)
+        if shminfo.shmid < 0:
+            self.x11.XFree(image)
+            return None
+        address = self.libc.shmat(shminfo.shmid, None, 0)
+        if address in (None, c_void_p(-1).value):
+            self.libc.shmctl(shminfo.shmid, self.IPC_RMID, None)
+            self.x11.XFree(image)
+            return None
+        shminfo.shmaddr = address
+        shminfo.readOnly = 0
+        image.contents.data = address
+        self.error = False
+        self.xext.XShmAttach(self.display, byref(shminfo))
+        self.x11.XSync(self.display, 0)
+        # Removed now, freed by the kernel once both sides detach
+        self.libc.shmctl(shminfo.shmid, self.IPC_RMID, None)
+        if self.error:
+            # e.g. remote X server without access to our shared memory
+            self.libc.shmdt(address)
+            self.x11.XFree(image)
+            self.available = False
+            return None
+        pixels = np.ctypeslib.as_array((c.c_ubyte * (stride * h)).from_address(address))
+        frame = pixels.reshape(h, stride // 4, 4)[:, :w]
+        return image, shminfo, frame
+
+    def release_segment(self, segment):
+        image, shminfo, frame = segment
+        self.xext.XShmDetach(self.display, byref(shminfo))
+        self.x11.XSync(self.display, 0)
+        self.libc.shmdt(shminfo.shmaddr)
+        self.x11.XFree(image)
+
+    def capture(self, hwnd, x, y, w, h, out=None):
+        """
+        Returns the (h, w, 4) BGRX region copied into out (a new array when None),
+        or None if MIT-SHM could not capture it
+        """
+        import numpy as np
+        with self.lock:
+            key = (hwnd, x, y, w, h)
+            segment = self.segments.get(key)
+            if segment is None:
+                if len(self.segments) >= self.MAX_SEGMENTS:
+                    self.release_segment(self.segments.pop(next(iter(self.segments))))
+                segment = self.create_segment(w, h)
+                if segment is None:
+                    return None
+                self.segments[key] = segment
+            image, shminfo, frame = segment
+            self.error = False
+            if not self.xext.XShmGetImage(self.display, hwnd, image, x, y, 0xFFFFFFFF) or self.error:
+                # Region outside the window or window gone, let the caller fall back
+                self.release_segment(self.segments.pop(key))
+                return None
+            if out is None:
+                return frame.copy()
+            np.copyto(out, frame)
+            return out
+
+    def close(self):
+        with self.lock:
+            for segment in self.segments.values():
+                self.release_segment(segment)
+            self.segments.clear()
+
+
+class ScreenCaptureAPI(LazyDisplay):
+    """Cross-platform screen capture"""
+
+    # Set to False to always capture through the X socket
+    use_shm = True
+    shm = None
+
+    def shm_capture(self):
+        """XShmCapture opened on first use, None when MIT-SHM is unavailable"""
+        if not self.use_shm:
+            return None
+        if self.shm is None:
+            self.shm = XShmCapture()
+            if not self.shm.available:
+                print("MIT-SHM unavailable, capturing through the X socket")
+        return self.shm if self.shm.available else None
     
-    def capture_window(self, hwnd, x, y, w, h):
-        """Capture window region and return as numpy array"""
+    def capture_window(self, hwnd, x, y, w, h, out=None):
+        """
+        Capture window region and return it as an (h, w, 4) BGRA/BGRX numpy array,
+        written into out when given so a caller can reuse one buffer between captures.
+        """
         if IS_WINDOWS:
             import numpy as np
-            from PIL import Image
             
             wDC = win32gui.GetWindowDC(hwnd)
             dc_obj = win32ui.CreateDCFromHandle(wDC)
@@ -327,20 +836,27 @@ class ScreenCaptureAPI:
             win32gui.ReleaseDC(hwnd, wDC)
             win32gui.DeleteObject(data_bitmap.GetHandle())
             
+            if out is not None:
+                np.copyto(out, img)
+                return out
             return img
         else:  # Linux
             import numpy as np
-            from PIL import Image
-            
+
+            shm = self.shm_capture()
+            if shm is not None:
+                frame = shm.capture(hwnd, x, y, w, h, out)
+                if frame is not None:
+                    return frame
+
             window = self.display.create_resource_object('window', hwnd)
-            geom = window.get_geometry()
             
-            # Capture the window
+            # Capture the window, ZPixmap at 24/32 bit depth is BGRX
             raw = window.get_image(x, y, w, h, X.ZPixmap, 0xffffffff)
-            image = Image.frombytes("RGB", (w, h), raw.data, "raw", "BGRX")
-            
-            # Convert to numpy array
-            img = np.array(image)
+            img = np.frombuffer(raw.data, dtype=np.uint8).reshape(h, -1, 4)[:, :w]
+            if out is not None:
+                np.copyto(out, img)
+                return out
             return img
 
 
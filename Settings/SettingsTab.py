@@ -244,12 +244,13 @@ class SettingsTab(QWidget):
     def save_addresses(self):
         try:
             data = {}
-            # Save Game Config
-            data["game_config"] = {
+            # Save Game Config, keeping tuning keys that have no widget
+            data["game_config"] = manage_profile("load", "Save/Settings", "addresses").get("game_config", {})
+            data["game_config"].update({
                 "architecture": self.arch_combo.currentText(),
                 "square_size": self.square_size_edit.text().strip(),
                 "collect_threshold": self.threshold_edit.text().strip()
-            }
+            })
 
             # Save Addresses
             for key, widgets in self.address_widgets.items():
@@ -10,7 +10,10 @@ from Addresses import attack_Lock
 
 def attack_monster(attack_data) -> bool:
     target_x, target_y, target_z, target_name, target_hp = read_target_info()
-    current_hp, current_max_hp, current_mp, current_max_mp = read_my_stats()
+    snapshot = current_snapshot()
+    if snapshot is None:
+        return False
+    current_hp, current_max_hp, current_mp, current_max_mp = snapshot.hp, snapshot.max_hp, snapshot.mp, snapshot.max_mp
     if target_hp is None or target_hp < 0 or target_hp > 100:
         target_hp = 100
     hp_percentage = (current_hp * 100) / current_max_hp
@@ -25,7 +28,7 @@ def attack_monster(attack_data) -> bool:
     
     # Check distance if min_dist is set
     if min_dist != 0:
-        x, y, z = read_my_wpt()
+        x, y, z = snapshot.x, snapshot.y, snapshot.z
         dist_x = abs(x - target_x)
         dist_y = abs(y - target_y)
         # Only cast spell if target is within the specified distance
@@ -47,6 +50,11 @@ class SpellThread(QThread):
     def run(self):
         while self.running:
             try:
+                version = game_state.version
+                if read_targeting_status() == 0 and game_state.latest() is not None:
+                    # Nothing to attack, sleep until a target is acquired
+                    game_state.wait_for_event((EVENT_TARGET_ACQUIRED,), version, 0.2)
+                    continue
                 if not attack_Lock.locked():
                     for spell_data in self.spell_data_list:
                         if not self.running: break
@@ -2,6 +2,8 @@
 from PyQt5.QtWidgets import QApplication
 import pytesseract
 import Addresses
+import argparse
+import atexit
 import os
 import sys
 import platform
@@ -36,9 +38,18 @@ else:
 pytesseract.pytesseract.tesseract_cmd = tesseract_path
 
 from General.SelectTibiaTab import SelectTibiaTab
+from Functions.InstrumentationFunctions import memory_stats
 
 
 def main():
+    parser = argparse.ArgumentParser(description="EasyBot")
+    parser.add_argument("--memory-stats", metavar="FILE",
+                        help="record memory read stats and write them as JSON to FILE on exit")
+    args, _ = parser.parse_known_args()
+    if args.memory_stats:
+        memory_stats.enable()
+        atexit.register(memory_stats.dump, args.memory_stats)
+
     # Make directories
     os.makedirs("Images", exist_ok=True)
     os.makedirs("Save", exist_ok=True)
@@ -9,10 +9,10 @@ from Addresses import coordinates_x, coordinates_y, screen_width, screen_height,
     battle_x, battle_y
 from Functions.GeneralFunctions import load_items_images
 from Functions.MemoryFunctions import *
-from Functions.GeneralFunctions import WindowCapture, merge_close_points
+from Functions.GeneralFunctions import capture_session
 from Functions.KeyboardFunctions import press_hotkey, chase_monster, stay_diagonal, chaseDiagonal_monster
 from Functions.MouseFunctions import manage_collect, mouse_function
-from Looting.LootingThread import LootThread
+from Looting.LootingThread import LootThread, LootWorker
 from Functions.KeyboardFunctions import walk
 from Functions.PathfindingFunctions import expand_waypoints, calculate_path_astar
 import cv2 as cv
@@ -40,12 +40,15 @@ class TargetThread(QThread):
         self.loot_state = loot_state
         self.state_lock = QMutex()
         self.loot_table = loot_table
-        self.looting_thread = None
+        # Loots the corpses queued after each kill while targeting goes on
+        self.loot_worker = LootWorker(loot_table, loot_state) if loot_table else None
         self.discovered_obstacles = set()
         self.last_target_pos = None
         self.blacklist_tiles = blacklist_tiles if blacklist_tiles else set()
 
     def run(self):
+        if self.loot_worker:
+            self.loot_worker.start()
         my_x, my_y, my_z = read_my_wpt()
         previous_pos = (my_x, my_y, my_z)
         stuck_timer = 0
@@ -138,23 +141,20 @@ class TargetThread(QThread):
                         y = target_y - y
                         corpse_x = coordinates_x[0] + x * Addresses.square_size
                         corpse_y = coordinates_y[0] + y * Addresses.square_size
-                        if open_corpse:
-                            QThread.msleep(random.randint(400, 500))
-                            if self.looting_thread and self.looting_thread.isRunning():
-                                self.looting_thread.stop()
-                                self.looting_thread.wait(10)
-                            mouse_function(corpse_x, corpse_y, option=1)
-                            QThread.msleep(random.randint(300, 500))  # Small delay to allow container to open
-
-                            # Start new looting thread if loot table is available
-                            if self.loot_table:
-                                self.looting_thread = LootThread(self.loot_table, self.loot_state, one_shot=True)
-                                self.looting_thread.start()
-                        if 'Skin' in target_data and target_data['Skin'] > 0:
-                            press_hotkey(target_data['Skin'])
-                            QThread.msleep(random.randint(10, 50))
-                            mouse_function(corpse_x, corpse_y, option=2)
-                            QThread.msleep(random.randint(150, 250))
+                        skin = target_data.get('Skin', 0)
+                        if open_corpse and self.loot_worker:
+                            # Opened, looted and skinned by the worker once the corpse is there
+                            self.loot_worker.add_corpse(corpse_x, corpse_y, (target_x, target_y, target_z), target_name, skin)
+                        else:
+                            if open_corpse:
+                                QThread.msleep(random.randint(*LootWorker.CORPSE_DELAY))
+                                mouse_function(corpse_x, corpse_y, option=1)
+                                QThread.msleep(random.randint(300, 500)) # Small delay to allow container to open
+                            if skin > 0:
+                                press_hotkey(skin)
+                                QThread.msleep(random.randint(10, 50))
+                                mouse_function(corpse_x, corpse_y, option=2)
+                                QThread.msleep(random.randint(150, 250))
 
                     else:
                         if walker_Lock.locked():
@@ -169,6 +169,8 @@ class TargetThread(QThread):
         with QMutexLocker(self.state_lock):
             if option == 0:
                 self.loot_state = state
+                if self.loot_worker:
+                    self.loot_worker.update_states(state)
 
     def scan_and_click_battle_list_ocr(self):
         try:
@@ -182,7 +184,7 @@ class TargetThread(QThread):
             height = bh - by
 
             # Capture Battle List region
-            capture = WindowCapture(width, height, bx, by)
+            capture = capture_session(width, height, bx, by)
             screenshot = capture.get_screenshot()
 
             # Preprocess for OCR
@@ -227,7 +229,7 @@ class TargetThread(QThread):
 
     def stop(self):
         self.running = False
-        if self.looting_thread:
-            self.looting_thread.stop()
-            self.looting_thread.wait()
+        if self.loot_worker:
+            self.loot_worker.stop()
+            self.loot_worker.wait()
 
@@ -1,4 +1,5 @@
 import random
+import time
 from PyQt5.QtCore import QThread, pyqtSignal, Qt
 from PyQt5.QtWidgets import QListWidgetItem
 
@@ -27,12 +28,20 @@ class WalkerThread(QThread):
         second_timer = 0
         self.discovered_obstacles = set()
         self.last_target_pos = None
+        version = game_state.version
         my_x, my_y, my_z = read_my_wpt()
         previous_pos = (my_x, my_y, my_z)
         while self.running:
             try:
                 sleep_value = random.randint(10, 50)
-                QThread.msleep(sleep_value)
+                if game_state.latest() is not None:
+                    # Continue as soon as the character moves, after a short random delay
+                    started = time.monotonic()
+                    if game_state.wait_for_event((EVENT_POSITION_CHANGED,), version, sleep_value / 1000):
+                        QThread.msleep(random.randint(10, 20))
+                    sleep_value = int((time.monotonic() - started) * 1000)
+                else:
+                    QThread.msleep(sleep_value)
                 if not walker_Lock.locked():
                     timer += sleep_value
                     second_timer += (sleep_value / 1000)
@@ -48,6 +57,7 @@ class WalkerThread(QThread):
                 map_x = wpt_data['X']
                 map_y = wpt_data['Y']
                 map_z = wpt_data['Z']
+                version = game_state.version
                 my_x, my_y, my_z = read_my_wpt()
                 if my_x == map_x  and my_y == map_y and my_z == map_z:
                     current_wpt = (current_wpt + 1) % len(self.waypoints)